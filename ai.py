@@ -1,12 +1,13 @@
 from minio import Minio
 from dotenv import load_dotenv
-import json
 import os
-from ollama import Client
+from concurrent.futures import ThreadPoolExecutor
 from extract2 import extract_text_word_level_columns
 from prompts import get_edu_timezone_prompt, get_experience_prompt, get_skill_prompt
-from utils import clean_response
+from layout import Document
+from schemas import EduTimezone, Skills, ExperiencePeriods
 from api import set_status, update_parsed_data
+import llm
 
 load_dotenv()
 
@@ -16,68 +17,105 @@ minio_client = Minio(
     secret_key=os.getenv("MINIO_SECRET_KEY"),
     secure=False,  # Use True for HTTPS, False for HTTP
 )
-ollama_client = Client()
-
-
-def extract_resume_data(pdf_text: str) -> dict:
-    edu_timezone_response = ollama_client.chat(
-        model="edu-timezone-extractor:latest",
-        messages=[
-            {
-                "role": "user",
-                "content": pdf_text,
-            },
-        ],
-        think=False,
-    )
 
-    skill_response = ollama_client.chat(
-        model="skills-extractor:latest",
-        messages=[
-            {
-                "role": "user",
-                "content": pdf_text,
-            },
-        ],
-        think=False,
+# Run the three extractor models at the same time instead of one after another.
+# The per-host cap in llm.py still bounds how many requests hit Ollama at once.
+CONCURRENT_EXTRACTION = os.getenv("CONCURRENT_EXTRACTION", "true").lower() == "true"
+
+# Send each extractor model only the resume sections it reads instead of the
+# whole text, falling back to the whole text when its main section isn't found
+SECTION_TARGETED_EXTRACTION = (
+    os.getenv("SECTION_TARGETED_EXTRACTION", "true").lower() == "true"
+)
+# A section shorter than this is treated as not found (a heading whose content
+# was lost to a broken layout)
+MIN_SECTION_CHARS = int(os.getenv("MIN_SECTION_CHARS", "40"))
+# Rough size of a token, only used to report the savings
+CHARS_PER_TOKEN = 4
+
+# (model, think, sections, schema) for each extractor, merged in this order.
+# The first section is the one that has to be found, None is the text before
+# the first heading where the name, address and phone number usually are.
+EXTRACTOR_MODELS = [
+    (
+        "edu-timezone-extractor:latest",
+        False,
+        ["education", None, "contact"],
+        EduTimezone,
+    ),
+    ("skills-extractor:latest", False, ["skills"], Skills),
+    ("experience-extractor:latest", True, ["experience"], ExperiencePeriods),
+]
+
+_extractor_pool = ThreadPoolExecutor(
+    max_workers=max(len(EXTRACTOR_MODELS), llm.OLLAMA_MAX_IN_FLIGHT),
+    thread_name_prefix="extractor",
+)
+
+
+def section_text(document: Document, sections: list) -> str | None:
+    """
+    Text of the given sections of the resume in reading order, or None when
+    the first of them isn't found.
+    """
+    found = document.sections()
+    if len(found.get(sections[0], "").strip()) < MIN_SECTION_CHARS:
+        return None
+    return "\n\n".join(
+        text for section, text in found.items() if section in sections and text
     )
 
-    experience_response = ollama_client.chat(
-        model="experience-extractor:latest",
-        messages=[
-            {
-                "role": "user",
-                "content": pdf_text,
-            },
-        ],
-        think=True,
+
+def _extract(model: str, think: bool, sections: list, schema, document: Document):
+    full_text = document.text()
+    content = None
+    if SECTION_TARGETED_EXTRACTION:
+        content = section_text(document, sections)
+    sent = "full text" if content is None else ", ".join(map(str, sections))
+    if content is None:
+        content = full_text
+
+    parsed, response = llm.chat_structured(model, content, schema, think)
+    saved_tokens = (len(full_text) - len(content)) // CHARS_PER_TOKEN
+    print(
+        f"{model}: sent {sent} ({len(content)}/{len(full_text)} chars, "
+        f"~{saved_tokens} tokens saved, "
+        f"{response.get('prompt_eval_count')} prompt tokens)"
     )
+    return parsed
+
+
+def extract_resume_data(resume: str | Document, concurrent: bool = None) -> dict:
+    """
+    Run the three extractor models on the resume and merge their answers.
+    A model whose answer can't be validated leaves its fields out instead of
+    discarding the other two.
+    """
+    if concurrent is None:
+        concurrent = CONCURRENT_EXTRACTION
+    if isinstance(resume, str):
+        resume = Document.from_text(resume)
+
+    if concurrent:
+        futures = [
+            _extractor_pool.submit(_extract, model, think, sections, schema, resume)
+            for model, think, sections, schema in EXTRACTOR_MODELS
+        ]
+        results = [future.result() for future in futures]
+    else:
+        results = [
+            _extract(model, think, sections, schema, resume)
+            for model, think, sections, schema in EXTRACTOR_MODELS
+        ]
 
-    edu_timezone_response = clean_response(edu_timezone_response["message"]["content"])
-    skill_response = clean_response(skill_response["message"]["content"])
-    experience_response = clean_response(experience_response["message"]["content"])
-
-    try:
-        # load each part as json
-        edu_timezone_json = json.loads(edu_timezone_response)
-        skill_json = json.loads(skill_response)
-        experience_json = json.loads(experience_response)
-
-        # Combine all three parts into one JSON
-        response_json = {
-            **edu_timezone_json,
-            **skill_json,
-            **experience_json,
-        }
-
-        predicted = response_json
-        return predicted
-    except json.JSONDecodeError as e:
-        print(f"JSON decode error: {e}")
-        print(edu_timezone_response)
-        print(skill_response)
-        print(experience_response)
-        return {}
+    # Combine all three parts into one JSON
+    predicted = {}
+    for (model, _, _, _), result in zip(EXTRACTOR_MODELS, results):
+        if result is None:
+            print(f"No valid response from {model}, leaving its fields out")
+            continue
+        predicted.update(result.model_dump())
+    return predicted
 
 
 # resumes/2025/wawasd-1758326293362.pdf
@@ -1,8 +1,12 @@
+from abc import ABC, abstractmethod
+import asyncio
 from dotenv import load_dotenv
 import os
-import requests
+import httpx
 import json
 import datetime
+import threading
+import time
 
 load_dotenv()
 
@@ -12,234 +16,550 @@ headers = {
     "x-api-key": API_KEY,
 }
 
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:3000/api/trpc")
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "10"))
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "3"))
+# seconds before the first retry, doubled for every retry after that
+API_RETRY_BACKOFF = float(os.getenv("API_RETRY_BACKOFF", "0.5"))
+API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "20"))
+# buffered writes are sent at the latest this many seconds after the first one
+API_FLUSH_INTERVAL = float(os.getenv("API_FLUSH_INTERVAL", "0.2"))
 
-def set_status(applicant_id: int, status: str):
-    if status not in ["pending", "parsing", "processing", "completed", "failed"]:
-        raise ValueError("Invalid status")
-    API_URL = "http://localhost:3000/api/trpc/applicant.updateStatusAI"
-    data = {
-        "json": {
-            "applicantId": applicant_id,
-            "statusAI": status,
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+# Procedures that queue a job. After a read timeout or a 500 raised inside the
+# procedure the job may already be queued, so these are only retried when the
+# request can't have reached the procedure (no connection, or a 502 / 503 /
+# 504 from in front of it)
+NOT_REPEATABLE_PROCEDURES = {
+    "applicant.queueScoring",
+    "applicant.reQueueResumeProcessing",
+    "job.queueScoringAll",
+}
+SAFE_RETRY_STATUS_CODES = {502, 503, 504}
+SAFE_RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class ApiProcedures(ABC):
+    """
+    The tRPC procedures the worker calls. Subclasses provide post(), which
+    returns (status_code, json).
+    """
+
+    @abstractmethod
+    def post(self, procedure: str, data: dict):
+        pass
+
+    def set_status(self, applicant_id: int, status: str):
+        if status not in ["pending", "parsing", "processing", "completed", "failed"]:
+            raise ValueError("Invalid status")
+        procedure = "applicant.updateStatusAI"
+        data = {
+            "json": {
+                "applicantId": applicant_id,
+                "statusAI": status,
+            }
         }
-    }
-    response = requests.post(API_URL, headers=headers, data=json.dumps(data))
-    return response.status_code, response.json()
-
-
-def update_parsed_data(applicant_id: int, parsed_data: dict):
-    # {'highestEducationDegree': 'Bachelor', 'educationField': 'Computer Science', 'timezone': 'GMT+8', 'skills': ['C++ Programming Language', 'Visual Basic 6.0', 'PHP Scripting Language', 'HTML/CSS', 'Mysql Database', 'Joomla', 'Adobe Photoshop (any version)', 'Adobe Illustrator', 'Adobe Dreamweaver', 'Adobe Flash', 'Adobe After Effects'], 'experiencePeriods': [{'startYear': '2011', 'endYear': 'Present'}]}
-    data = {}
-    data["parsedHighestEducationDegree"] = parsed_data.get("highestEducationDegree")
-    data["parsedEducationField"] = parsed_data.get("educationField")
-    data["parsedTimezone"] = parsed_data.get("timezone")
-    if "skills" in parsed_data:
-        data["parsedSkills"] = ", ".join(parsed_data["skills"])
-    else:
-        data["parsedSkills"] = ""
-
-    # For experience periods, calculate total years of experience, present is current year
-    # experience periods is a list of dicts with startYear and endYear, it is not guaranteed to be sorted
-    # if "experiencePeriods" in parsed_data:
-    #     current_year = datetime.datetime.now().year
-
-    #     # Normalize periods (replace "Present" with current year)
-    #     normalized = []
-    #     for period in parsed_data["experiencePeriods"]:
-    #         start_year = int(period["startYear"])
-    #         end_year = (
-    #             current_year
-    #             if period["endYear"].lower() == "present"
-    #             else int(period["endYear"])
-    #         )
-    #         normalized.append((start_year, end_year))
-
-    #     # Sort by start year
-    #     normalized.sort(key=lambda x: x[0])
-
-    #     # Merge overlapping intervals
-    #     merged = []
-    #     for start, end in normalized:
-    #         if not merged or merged[-1][1] < start - 1:
-    #             merged.append([start, end])
-    #         else:
-    #             merged[-1][1] = max(merged[-1][1], end)
-
-    #     # Calculate total years of experience
-    #     total_years = sum((end - start + 1) for start, end in merged)
-    #     data["parsedYearsOfExperience"] = total_years - 1
-    # else:
-    #     data["parsedYearsOfExperience"] = 0
-    data["parsedYearsOfExperience"] = 0
-
-    API_URL = "http://localhost:3000/api/trpc/applicant.updateParsedDataAI"
-    data = {
-        "json": {
-            "applicantId": applicant_id,
-            "parsedHighestEducationDegree": data["parsedHighestEducationDegree"],
-            "parsedEducationField": data["parsedEducationField"],
-            "parsedTimezone": data["parsedTimezone"],
-            "parsedSkills": data["parsedSkills"],
-            "parsedYearsOfExperience": data["parsedYearsOfExperience"],
-            "parsedExperiences": (
-                parsed_data["experiencePeriods"]
-                if "experiencePeriods" in parsed_data
-                else []
-            ),
+        return self.post(procedure, data)
+
+    def update_parsed_data(self, applicant_id: int, parsed_data: dict):
+        # {'highestEducationDegree': 'Bachelor', 'educationField': 'Computer Science', 'timezone': 'GMT+8', 'skills': ['C++ Programming Language', 'Visual Basic 6.0', 'PHP Scripting Language', 'HTML/CSS', 'Mysql Database', 'Joomla', 'Adobe Photoshop (any version)', 'Adobe Illustrator', 'Adobe Dreamweaver', 'Adobe Flash', 'Adobe After Effects'], 'experiencePeriods': [{'startYear': '2011', 'endYear': 'Present'}]}
+        data = {}
+        data["parsedHighestEducationDegree"] = parsed_data.get("highestEducationDegree")
+        data["parsedEducationField"] = parsed_data.get("educationField")
+        data["parsedTimezone"] = parsed_data.get("timezone")
+        if "skills" in parsed_data:
+            data["parsedSkills"] = ", ".join(parsed_data["skills"])
+        else:
+            data["parsedSkills"] = ""
+
+        # For experience periods, calculate total years of experience, present is current year
+        # experience periods is a list of dicts with startYear and endYear, it is not guaranteed to be sorted
+        # if "experiencePeriods" in parsed_data:
+        #     current_year = datetime.datetime.now().year
+
+        #     # Normalize periods (replace "Present" with current year)
+        #     normalized = []
+        #     for period in parsed_data["experiencePeriods"]:
+        #         start_year = int(period["startYear"])
+        #         end_year = (
+        #             current_year
+        #             if period["endYear"].lower() == "present"
+        #             else int(period["endYear"])
+        #         )
+        #         normalized.append((start_year, end_year))
+
+        #     # Sort by start year
+        #     normalized.sort(key=lambda x: x[0])
+
+        #     # Merge overlapping intervals
+        #     merged = []
+        #     for start, end in normalized:
+        #         if not merged or merged[-1][1] < start - 1:
+        #             merged.append([start, end])
+        #         else:
+        #             merged[-1][1] = max(merged[-1][1], end)
+
+        #     # Calculate total years of experience
+        #     total_years = sum((end - start + 1) for start, end in merged)
+        #     data["parsedYearsOfExperience"] = total_years - 1
+        # else:
+        #     data["parsedYearsOfExperience"] = 0
+        data["parsedYearsOfExperience"] = 0
+
+        procedure = "applicant.updateParsedDataAI"
+        data = {
+            "json": {
+                "applicantId": applicant_id,
+                "parsedHighestEducationDegree": data["parsedHighestEducationDegree"],
+                "parsedEducationField": data["parsedEducationField"],
+                "parsedTimezone": data["parsedTimezone"],
+                "parsedSkills": data["parsedSkills"],
+                "parsedYearsOfExperience": data["parsedYearsOfExperience"],
+                "parsedExperiences": (
+                    parsed_data["experiencePeriods"]
+                    if "experiencePeriods" in parsed_data
+                    else []
+                ),
+            }
         }
-    }
-    print(data)
-    response = requests.post(API_URL, headers=headers, data=json.dumps(data))
-    return response.status_code, response.json()
+        print(data)
+        return self.post(procedure, data)
 
+    def re_queue_resume(self, applicant_id: int):
+        procedure = "applicant.reQueueResumeProcessing"
+        data = {
+            "json": {
+                "applicantId": applicant_id,
+            }
+        }
+        return self.post(procedure, data)
 
-def re_queue_resume(applicant_id: int):
-    API_URL = "http://localhost:3000/api/trpc/applicant.reQueueResumeProcessing"
-    data = {
-        "json": {
-            "applicantId": applicant_id,
+    def queue_score_resume(self, applicant_id: int):
+        procedure = "applicant.queueScoring"
+        data = {
+            "json": {
+                "applicantId": applicant_id,
+            }
         }
-    }
-    response = requests.post(API_URL, headers=headers, data=json.dumps(data))
-    return response.status_code, response.json()
+        return self.post(procedure, data)
+
+    def update_matched_skills(self, applicant_id: int, matched_skills: list[dict]):
+        """
+        Update matched skills for an applicant.
 
+        Args:
+            applicant_id: The ID of the applicant
+            matched_skills: List of matched skills, each containing:
+                - jobSkill: str (max 100 chars)
+                - matchType: str ("explicit", "implied", or "missing")
+                - applicantSkill: str (max 100 chars)
+                - score: float (0-100)
+                - reason: str (optional)
 
-def queue_score_resume(applicant_id: int):
-    API_URL = "http://localhost:3000/api/trpc/applicant.queueScoring"
-    data = {
-        "json": {
-            "applicantId": applicant_id,
+        Example:
+            matched_skills = [
+                {
+                    "jobSkill": "Python",
+                    "matchType": "explicit",
+                    "applicantSkill": "Python Programming",
+                    "score": 95.0,
+                    "reason": "Direct match found in resume"
+                }
+            ]
+        """
+        procedure = "applicant.updateApplicantMatchedSkillsAI"
+        data = {
+            "json": {
+                "applicantId": applicant_id,
+                "matchedSkills": matched_skills,
+            }
         }
-    }
-    response = requests.post(API_URL, headers=headers, data=json.dumps(data))
-    return response.status_code, response.json()
+        print("DATA TO SEND:", data)
+        return self.post(procedure, data)
 
+    def update_applicant_experience_relevance(
+        self, applicant_id: int, experiences: list[dict]
+    ):
+        """
+        Update experience relevance for an applicant.
 
-def update_matched_skills(applicant_id: int, matched_skills: list[dict]):
-    """
-    Update matched skills for an applicant.
-
-    Args:
-        applicant_id: The ID of the applicant
-        matched_skills: List of matched skills, each containing:
-            - jobSkill: str (max 100 chars)
-            - matchType: str ("explicit", "implied", or "missing")
-            - applicantSkill: str (max 100 chars)
-            - score: float (0-100)
-            - reason: str (optional)
-
-    Example:
-        matched_skills = [
-            {
-                "jobSkill": "Python",
-                "matchType": "explicit",
-                "applicantSkill": "Python Programming",
-                "score": 95.0,
-                "reason": "Direct match found in resume"
+        Args:
+            applicant_id: The ID of the applicant
+            experiences: List of experiences, each containing:
+                - id: int (experience ID)
+                - relevant: bool
+
+        Example:
+            experiences = [
+                {
+                    "id": 123,
+                    "relevant": True
+                },
+                {
+                    "id": 124,
+                    "relevant": False
+                }
+            ]
+        """
+        procedure = "applicant.updateApplicantExperienceRelevanceAI"
+        data = {
+            "json": {
+                "applicantId": applicant_id,
+                "experiences": experiences,
             }
-        ]
-    """
-    API_URL = "http://localhost:3000/api/trpc/applicant.updateApplicantMatchedSkillsAI"
-    data = {
-        "json": {
-            "applicantId": applicant_id,
-            "matchedSkills": matched_skills,
         }
-    }
-    print("DATA TO SEND:", data)
-    response = requests.post(API_URL, headers=headers, data=json.dumps(data))
-    return response.status_code, response.json()
+        print("DATA TO SEND:", data)
+        return self.post(procedure, data)
 
+    def update_applicant_scores(
+        self,
+        applicant_id: int,
+        skills_score: float,
+        experience_score: float,
+        education_score: float,
+        timezone_score: float,
+        overall_score: float,
+        parsedYearsOfExperience: float = 0.0,
+    ):
+        """
+        Update AI scores for an applicant.
 
-def update_applicant_experience_relevance(applicant_id: int, experiences: list[dict]):
-    """
-    Update experience relevance for an applicant.
-
-    Args:
-        applicant_id: The ID of the applicant
-        experiences: List of experiences, each containing:
-            - id: int (experience ID)
-            - relevant: bool
-
-    Example:
-        experiences = [
-            {
-                "id": 123,
-                "relevant": True
-            },
-            {
-                "id": 124,
-                "relevant": False
+        Args:
+            applicant_id: The ID of the applicant
+            skills_score: Skills score (0-100)
+            experience_score: Experience score (0-100)
+            education_score: Education score (0-100)
+            timezone_score: Timezone score (0-100)
+            overall_score: Overall score (0-100)
+
+        Example:
+            update_applicant_scores(
+                applicant_id=123,
+                skills_score=85.5,
+                experience_score=90.0,
+                education_score=75.0,
+                timezone_score=100.0,
+                overall_score=87.6
+            )
+        """
+        procedure = "applicant.updateApplicantScoresAI"
+        data = {
+            "json": {
+                "applicantId": applicant_id,
+                "skillsScoreAI": skills_score,
+                "experienceScoreAI": experience_score,
+                "educationScoreAI": education_score,
+                "timezoneScoreAI": timezone_score,
+                "overallScoreAI": overall_score,
+                "parsedYearsOfExperience": parsedYearsOfExperience,
+            }
+        }
+        print("DATA TO SEND:", data)
+        return self.post(procedure, data)
+
+    def queue_all_applicants(self, job_id: int):
+        procedure = "job.queueScoringAll"
+        data = {
+            "json": {
+                "jobId": job_id,
             }
-        ]
-    """
-    API_URL = (
-        "http://localhost:3000/api/trpc/applicant.updateApplicantExperienceRelevanceAI"
-    )
-    data = {
-        "json": {
-            "applicantId": applicant_id,
-            "experiences": experiences,
         }
+        return self.post(procedure, data)
+
+    def update_applicant_results_bulk(self, job_id: int, results: list[dict]):
+        """
+        Write the scoring results of many applicants of a job in one request.
+
+        Args:
+            job_id: The ID of the job
+            results: List of per-applicant results, each containing:
+                - applicantId: int
+                - matchedSkills: list[dict] (same shape as update_matched_skills)
+                - experiences: list[dict] (same shape as update_applicant_experience_relevance)
+                - skillsScoreAI, experienceScoreAI, educationScoreAI,
+                  timezoneScoreAI, overallScoreAI: float (0-100)
+                - parsedYearsOfExperience: float
+                - statusAI: str
+              Applicants that failed to score only have applicantId and
+              statusAI "failed".
+        """
+        procedure = "applicant.updateApplicantResultsBulkAI"
+        data = {
+            "json": {
+                "jobId": job_id,
+                "results": results,
+            }
+        }
+        print(f"DATA TO SEND: {len(results)} applicant results for job {job_id}")
+        return self.post(procedure, data)
+
+    def update_overall_scores_bulk(self, job_id: int, scores: list[dict]):
+        """
+        Write only the overall score of many applicants of a job in one
+        request, after its weights changed.
+
+        Args:
+            job_id: The ID of the job
+            scores: List of {"applicantId": int, "overallScoreAI": float}
+        """
+        procedure = "applicant.updateApplicantOverallScoresBulkAI"
+        data = {
+            "json": {
+                "jobId": job_id,
+                "scores": scores,
+            }
+        }
+        print(f"DATA TO SEND: {len(scores)} overall scores for job {job_id}")
+        return self.post(procedure, data)
+
+
+def _client_options(base_url: str, api_key: str, timeout: float) -> dict:
+    return {
+        "base_url": base_url,
+        "headers": {**headers, "x-api-key": api_key},
+        "timeout": timeout,
+        # keep connections to the web app open between calls
+        "limits": httpx.Limits(
+            max_connections=API_MAX_CONNECTIONS,
+            max_keepalive_connections=API_MAX_CONNECTIONS,
+        ),
     }
-    print("DATA TO SEND:", data)
-    response = requests.post(API_URL, headers=headers, data=json.dumps(data))
-    return response.status_code, response.json()
-
-
-def update_applicant_scores(
-    applicant_id: int,
-    skills_score: float,
-    experience_score: float,
-    education_score: float,
-    timezone_score: float,
-    overall_score: float,
-    parsedYearsOfExperience: float = 0.0,
-):
+
+
+def _batch_request(calls: list[tuple[str, dict]]) -> tuple[str, dict]:
+    # tRPC batching: procedures joined in the path, inputs keyed by position
+    path = "/" + ",".join(procedure for procedure, _ in calls)
+    data = {str(index): call_data for index, (_, call_data) in enumerate(calls)}
+    return path, data
+
+
+def _batch_repeatable(calls: list[tuple[str, dict]]) -> bool:
+    return not any(procedure in NOT_REPEATABLE_PROCEDURES for procedure, _ in calls)
+
+
+def _retry_policy(repeatable: bool) -> tuple[tuple, set]:
+    # (errors, status codes) a request is retried on
+    if repeatable:
+        return (httpx.TransportError,), RETRY_STATUS_CODES
+    return SAFE_RETRY_ERRORS, SAFE_RETRY_STATUS_CODES
+
+
+class ApiClient(ApiProcedures):
+    """
+    tRPC client sharing one pooled keep-alive connection pool, retrying
+    connection errors and 5xx responses with exponential backoff
+    (NOT_REPEATABLE_PROCEDURES only when they can't have run).
     """
-    Update AI scores for an applicant.
-
-    Args:
-        applicant_id: The ID of the applicant
-        skills_score: Skills score (0-100)
-        experience_score: Experience score (0-100)
-        education_score: Education score (0-100)
-        timezone_score: Timezone score (0-100)
-        overall_score: Overall score (0-100)
-
-    Example:
-        update_applicant_scores(
-            applicant_id=123,
-            skills_score=85.5,
-            experience_score=90.0,
-            education_score=75.0,
-            timezone_score=100.0,
-            overall_score=87.6
+
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        api_key: str = API_KEY,
+        timeout: float = API_TIMEOUT,
+        max_retries: int = API_MAX_RETRIES,
+        retry_backoff: float = API_RETRY_BACKOFF,
+    ):
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._client = httpx.Client(**_client_options(base_url, api_key or "", timeout))
+
+    def _request(
+        self,
+        path: str,
+        data: dict,
+        params: dict | None = None,
+        repeatable: bool = True,
+    ):
+        retry_errors, retry_codes = _retry_policy(repeatable)
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self._client.post(
+                    path, content=json.dumps(data), params=params
+                )
+            except retry_errors as e:
+                if last_attempt:
+                    raise
+                print(f"Request to {path} failed ({e}), retrying...")
+            else:
+                if response.status_code not in retry_codes or last_attempt:
+                    return response.status_code, response.json()
+                print(f"{path} returned {response.status_code}, retrying...")
+            time.sleep(self.retry_backoff * 2**attempt)
+
+    def post(self, procedure: str, data: dict):
+        return self._request(
+            f"/{procedure}",
+            data,
+            repeatable=procedure not in NOT_REPEATABLE_PROCEDURES,
         )
+
+    def post_batch(self, calls: list[tuple[str, dict]]):
+        """
+        Send several procedure calls in one tRPC batch request. Returns the
+        status code and the list of per-call results, in call order.
+        """
+        return self._request(
+            *_batch_request(calls),
+            params={"batch": "1"},
+            repeatable=_batch_repeatable(calls),
+        )
+
+    def close(self):
+        self._client.close()
+
+
+class AsyncApiClient(ApiProcedures):
+    """
+    Async variant of ApiClient for calling the API straight from the event
+    loop, with the same retries; every procedure method returns a coroutine.
     """
-    API_URL = "http://localhost:3000/api/trpc/applicant.updateApplicantScoresAI"
-    data = {
-        "json": {
-            "applicantId": applicant_id,
-            "skillsScoreAI": skills_score,
-            "experienceScoreAI": experience_score,
-            "educationScoreAI": education_score,
-            "timezoneScoreAI": timezone_score,
-            "overallScoreAI": overall_score,
-            "parsedYearsOfExperience": parsedYearsOfExperience,
-        }
-    }
-    print("DATA TO SEND:", data)
-    response = requests.post(API_URL, headers=headers, data=json.dumps(data))
-    return response.status_code, response.json()
 
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        api_key: str = API_KEY,
+        timeout: float = API_TIMEOUT,
+        max_retries: int = API_MAX_RETRIES,
+        retry_backoff: float = API_RETRY_BACKOFF,
+    ):
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._client = httpx.AsyncClient(
+            **_client_options(base_url, api_key or "", timeout)
+        )
 
-def queue_all_applicants(job_id: int):
-    API_URL = "http://localhost:3000/api/trpc/job.queueScoringAll"
-    data = {
-        "json": {
-            "jobId": job_id,
-        }
-    }
-    response = requests.post(API_URL, headers=headers, data=json.dumps(data))
-    return response.status_code, response.json()
+    async def _request(
+        self,
+        path: str,
+        data: dict,
+        params: dict | None = None,
+        repeatable: bool = True,
+    ):
+        retry_errors, retry_codes = _retry_policy(repeatable)
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = await self._client.post(
+                    path, content=json.dumps(data), params=params
+                )
+            except retry_errors as e:
+                if last_attempt:
+                    raise
+                print(f"Request to {path} failed ({e}), retrying...")
+            else:
+                if response.status_code not in retry_codes or last_attempt:
+                    return response.status_code, response.json()
+                print(f"{path} returned {response.status_code}, retrying...")
+            await asyncio.sleep(self.retry_backoff * 2**attempt)
+
+    async def post(self, procedure: str, data: dict):
+        return await self._request(
+            f"/{procedure}",
+            data,
+            repeatable=procedure not in NOT_REPEATABLE_PROCEDURES,
+        )
+
+    async def post_batch(self, calls: list[tuple[str, dict]]):
+        """
+        Async post_batch of ApiClient.
+        """
+        return await self._request(
+            *_batch_request(calls),
+            params={"batch": "1"},
+            repeatable=_batch_repeatable(calls),
+        )
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class WriteBuffer(ApiProcedures):
+    """
+    Collects procedure calls and sends them to the web app as one tRPC batch
+    request, on flush() / leaving the with block, or flush_interval seconds
+    after the first buffered call. Repeated calls to the same procedure for the
+    same applicant are coalesced, only the last one is sent.
+
+    The procedures in a tRPC batch run concurrently on the server, so calls that
+    depend on an earlier write (like queueing scoring after the parsed data is
+    saved, or the final status after the results) have to go out after a
+    flush, once batch_succeeded() says it went through.
+    Buffers for a single job should use flush_interval=0, so a timer doesn't
+    send part of the writes while the job is still waiting on a model.
+    """
+
+    def __init__(self, client: ApiClient, flush_interval: float = API_FLUSH_INTERVAL):
+        self.client = client
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def post(self, procedure: str, data: dict):
+        key = (procedure, data.get("json", {}).get("applicantId"))
+        with self._lock:
+            # dicts keep the position of the first call for a key
+            self._pending[key] = (procedure, data)
+            if self._timer is None and self.flush_interval > 0:
+                self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return None, None
+
+    def _timed_flush(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Error flushing buffered API writes: {e}")
+
+    def flush(self):
+        with self._lock:
+            calls = list(self._pending.values())
+            self._pending.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not calls:
+            return None, []
+        status_code, results = self.client.post_batch(calls)
+        procedures = ", ".join(procedure for procedure, _ in calls)
+        print(f"Flushed {len(calls)} writes ({procedures}): {status_code}")
+        if isinstance(results, list):
+            for (procedure, _), result in zip(calls, results):
+                if isinstance(result, dict) and "error" in result:
+                    print(f"{procedure} failed: {result['error']}")
+        return status_code, results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+
+def batch_succeeded(results) -> bool:
+    """
+    Whether every call of a flushed batch went through, given the results
+    returned by WriteBuffer.flush().
+    """
+    return isinstance(results, list) and not any(
+        isinstance(result, dict) and "error" in result for result in results
+    )
+
+
+# Shared client behind the module level functions
+api_client = ApiClient()
+# Shared client for handlers running on the worker's event loop
+async_api_client = AsyncApiClient()
+
+set_status = api_client.set_status
+update_parsed_data = api_client.update_parsed_data
+re_queue_resume = api_client.re_queue_resume
+queue_score_resume = api_client.queue_score_resume
+update_matched_skills = api_client.update_matched_skills
+update_applicant_experience_relevance = api_client.update_applicant_experience_relevance
+update_applicant_scores = api_client.update_applicant_scores
+queue_all_applicants = api_client.queue_all_applicants
+update_applicant_results_bulk = api_client.update_applicant_results_bulk
+update_overall_scores_bulk = api_client.update_overall_scores_bulk
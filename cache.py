@@ -0,0 +1,177 @@
+from collections import OrderedDict
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import threading
+import time
+
+load_dotenv()
+
+PDF_TEXT_CACHE_DIR = os.getenv("PDF_TEXT_CACHE_DIR", ".cache/pdf_text")
+PDF_TEXT_CACHE_MAX_BYTES = int(
+    os.getenv("PDF_TEXT_CACHE_MAX_BYTES", str(512 * 1024**2))
+)
+
+# Backend for cached model results: "memory" (per worker) or "redis" (shared)
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+
+class DiskLRUCache:
+    """
+    Size-bounded key/value cache stored as one file per entry in a directory.
+    File modification time is used as the recency marker: reads touch the
+    entry, and the least recently used entries are evicted once the total size
+    goes over max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(size for _, _, size in self._entries())
+
+    def _path(self, key: str) -> str:
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name)
+
+    def _entries(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                yield entry.path, stat.st_mtime, stat.st_size
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = f.read()
+            # mark as recently used
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: bytes):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            try:
+                previous_size = os.path.getsize(path)
+            except FileNotFoundError:
+                previous_size = 0
+            with open(tmp_path, "wb") as f:
+                f.write(value)
+            # atomic replace so concurrent readers never see a partial entry
+            os.replace(tmp_path, path)
+            self._total_bytes += len(value) - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        self._total_bytes = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+            except FileNotFoundError:
+                pass
+
+
+class MemoryLRUCache:
+    """
+    In-process cache with a maximum number of entries (least recently used
+    are dropped first) and a time to live per entry.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisCache:
+    """
+    Cache shared by every worker through Redis. Entries expire after ttl
+    seconds; LRU eviction is left to the server's maxmemory-policy.
+    """
+
+    def __init__(self, url: str, namespace: str, ttl: int):
+        import redis
+
+        self.namespace = namespace
+        self.ttl = ttl
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            return self._redis.get(f"{self.namespace}:{key}")
+        except Exception as e:
+            # a cache outage should only cost a model call, not fail the job
+            print(f"Redis cache get error: {e}")
+            return None
+
+    def set(self, key: str, value: bytes):
+        try:
+            self._redis.set(f"{self.namespace}:{key}", value, ex=self.ttl)
+        except Exception as e:
+            print(f"Redis cache set error: {e}")
+
+
+def make_result_cache(namespace: str):
+    """
+    Cache for deterministic model results, backend picked by RESULT_CACHE_BACKEND.
+    """
+    if RESULT_CACHE_BACKEND == "redis":
+        return RedisCache(REDIS_URL, f"cvrankify:{namespace}", RESULT_CACHE_TTL)
+    return MemoryLRUCache(RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL)
+
+
+def normalize_key_part(value: str) -> str:
+    # case and whitespace differences shouldn't produce different cache entries
+    return " ".join(str(value).lower().split())
+
+
+def hash_key(*parts) -> str:
+    return hashlib.sha256(
+        json.dumps(parts, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def pdf_text_cache_key(pdf_sha256: str, extractor: str, version: str) -> str:
+    """
+    Content-addressed key for extracted PDF text: the same PDF bytes (by
+    SHA-256 hex digest) extracted with the same extractor version always map
+    to the same entry.
+    """
+    return f"pdf_text:{extractor}:{version}:{pdf_sha256}"
+
+
+pdf_text_cache = DiskLRUCache(PDF_TEXT_CACHE_DIR, PDF_TEXT_CACHE_MAX_BYTES)
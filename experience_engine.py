@@ -0,0 +1,128 @@
+from datetime import datetime
+import numpy as np
+
+# Experience years without any model call: periods become month indices
+# (year * 12 + month) and the overlapping periods of every applicant are
+# merged in one vectorized pass, so a whole job can be re-scored at once when
+# only its yearsOfExperience changes.
+
+MONTHS = {
+    "January": 1,
+    "February": 2,
+    "March": 3,
+    "April": 4,
+    "May": 5,
+    "June": 6,
+    "July": 7,
+    "August": 8,
+    "September": 9,
+    "October": 10,
+    "November": 11,
+    "December": 12,
+    "None": 1,
+    None: 1,
+}
+
+
+def period_bounds(period: dict, now: datetime | None = None) -> tuple[int, int]:
+    """
+    (start, end) month indices of an experience period, "Present" ending at
+    the current month. Raises ValueError for years that aren't numbers.
+    """
+    now = now or datetime.now()
+    start = int(period["startYear"]) * 12 + MONTHS.get(period["startMonth"], 1)
+    if period["endYear"] == "Present":
+        end = now.year * 12 + now.month
+    else:
+        end = int(period["endYear"]) * 12 + MONTHS.get(period["endMonth"], 1)
+    return (start, end)
+
+
+def relevant_bounds(periods: list[dict], now: datetime | None = None) -> list:
+    """
+    period_bounds of the periods flagged relevant.
+    """
+    return [period_bounds(p, now) for p in periods if p.get("relevant", False)]
+
+
+def merged_months(
+    owners: np.ndarray, starts: np.ndarray, ends: np.ndarray, applicants: int
+) -> np.ndarray:
+    """
+    Months covered by each applicant's periods, overlapping or touching
+    periods counted once. owners[i] is the applicant index of period
+    (starts[i], ends[i]); returns one total per applicant index.
+    """
+    totals = np.zeros(applicants, dtype=np.int64)
+    if len(owners) == 0:
+        return totals
+    # same order as sorting (start, end) tuples per applicant
+    order = np.lexsort((ends, starts, owners))
+    owners = owners[order]
+    starts = starts[order].astype(np.int64)
+    ends = ends[order].astype(np.int64)
+
+    # shift every applicant into its own range of indices so a single
+    # running maximum never carries an end over into the next applicant
+    base = min(starts.min(), ends.min())
+    span = max(starts.max(), ends.max()) - base + 1
+    offset = owners.astype(np.int64) * span - base
+    running_end = np.maximum.accumulate(ends + offset)
+    # a period starts a new merged range when it begins after every end
+    # before it, which the offsets make true for each applicant's first one
+    new_range = np.ones(len(owners), dtype=bool)
+    new_range[1:] = starts[1:] + offset[1:] > running_end[:-1]
+    first = np.flatnonzero(new_range)
+
+    range_months = np.maximum.reduceat(ends, first) - starts[first]
+    np.add.at(totals, owners[first], range_months)
+    return totals
+
+
+def total_months(applicants_bounds: list[list[tuple[int, int]]]) -> np.ndarray:
+    """
+    merged_months for one list of (start, end) bounds per applicant.
+    """
+    counts = [len(bounds) for bounds in applicants_bounds]
+    flat = [bound for bounds in applicants_bounds for bound in bounds]
+    owners = np.repeat(np.arange(len(applicants_bounds)), counts)
+    bounds = np.asarray(flat, dtype=np.int64).reshape(-1, 2)
+    return merged_months(owners, bounds[:, 0], bounds[:, 1], len(applicants_bounds))
+
+
+def experience_scores(
+    months: np.ndarray, required_years, has_experience: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (years, scores) from total months: the share of required_years (a number
+    or one per applicant) reached, times 100, plus 10 per year above it.
+    Applicants without relevant experience (has_experience False) get 0 for
+    both.
+    """
+    months = np.asarray(months)
+    required = np.broadcast_to(np.asarray(required_years, dtype=float), months.shape)
+    years = months // 12 + (months % 12) / 12
+    scores = np.where(
+        years >= required,
+        100 + (years - required) * 10,
+        np.divide(
+            years * 100, required, out=np.zeros(months.shape), where=required > 0
+        ),
+    )
+    if has_experience is not None:
+        years = np.where(has_experience, years, 0.0)
+        scores = np.where(has_experience, scores, 0.0)
+    return (years, scores)
+
+
+def score_experience(
+    applicants_bounds: list[list[tuple[int, int]]], required_years
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (years, scores) of every applicant from the bounds of their relevant
+    periods.
+    """
+    has_experience = np.array([len(b) > 0 for b in applicants_bounds], dtype=bool)
+    return experience_scores(
+        total_months(applicants_bounds), required_years, has_experience
+    )
@@ -1,30 +1,117 @@
-from doctr.models import ocr_predictor, db_mobilenet_v3_large
 from doctr.io import DocumentFile
+from model_registry import get_ocr_predictor, get_layout_model, HI_RES_MODEL_NAME
 from utils import extract_pdf_text
 import numpy as np
 from unstructured.partition.pdf import partition_pdf
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import os
+import re
+import pdfplumber
+import pypdfium2 as pdfium
+from layout import Document, Page, Column, Line
+
+load_dotenv()
+
+# Text layer quality needed before the tiered extractor trusts it over OCR
+MIN_CHARS_PER_PAGE = int(os.getenv("MIN_CHARS_PER_PAGE", "200"))
+MAX_GARBAGE_RATIO = float(os.getenv("MAX_GARBAGE_RATIO", "0.05"))
+
+# Only the first pages of long uploads (portfolios, certificates) are read, and
+# hi_res / OCR stop starting new pages once this much text was extracted.
+# 0 disables the limit.
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "10"))
+EXTRACTION_MAX_CHARS = int(os.getenv("EXTRACTION_MAX_CHARS", "30000"))
+# Pages run through hi_res / OCR at once
+OCR_PAGE_WORKERS = int(os.getenv("OCR_PAGE_WORKERS", "2"))
+
+# Bump the version of an extractor whenever its output changes (including
+# the output of the extractors it runs) so cached documents produced by the
+# old implementation are no longer used.
+EXTRACTOR_VERSIONS = {
+    # cached as a serialized layout.Document
+    "extract_document_tiered": "1",
+}
+
+# Tops of doctr blocks closer than this are read as one row
+BLOCK_LINE_THRESHOLD = 0.015
+
+# Resolution of the x projection profile used to find column gutters, and the
+# share of a page's words allowed to cross a gutter. Kept at 0 because a few
+# crossing words is also what a single column page with right aligned
+# locations / dates looks like.
+COLUMN_PROFILE_BINS = 200
+COLUMN_VALLEY_MAX_SHARE = 0.0
+
+
+def split_pdf_pages(path, max_pages=EXTRACTION_MAX_PAGES):
+    """
+    The first max_pages pages of a PDF (path or bytes) as single page PDFs, so
+    they can be extracted independently.
+    """
+    pdf = pdfium.PdfDocument(path)
+    try:
+        page_count = len(pdf) if max_pages <= 0 else min(len(pdf), max_pages)
+        pages = []
+        for index in range(page_count):
+            page_pdf = pdfium.PdfDocument.new()
+            page_pdf.import_pages(pdf, [index])
+            buffer = BytesIO()
+            page_pdf.save(buffer)
+            page_pdf.close()
+            pages.append(buffer.getvalue())
+        return pages
+    finally:
+        pdf.close()
+
+
+def map_pages(extract_page, pages, max_chars=EXTRACTION_MAX_CHARS, size=len):
+    """
+    Run extract_page on every page, OCR_PAGE_WORKERS pages at a time, and
+    return the results in page order. No new pages are started once
+    max_chars characters (size() of the results) were extracted.
+    """
+    texts = []
+    char_count = 0
+    with ThreadPoolExecutor(max_workers=OCR_PAGE_WORKERS) as pool:
+        for start in range(0, len(pages), OCR_PAGE_WORKERS):
+            window = pages[start : start + OCR_PAGE_WORKERS]
+            for text in pool.map(extract_page, window):
+                texts.append(text)
+                char_count += size(text)
+            if 0 < max_chars <= char_count and start + len(window) < len(pages):
+                print(
+                    f"Stopping extraction after {len(texts)}/{len(pages)} pages "
+                    f"({char_count} chars)"
+                )
+                break
+    return texts
+
+
+def _partition_page(page):
+    elements = partition_pdf(
+        file=BytesIO(page),
+        strategy="hi_res",
+        infer_table_structure=True,
+        hi_res_model_name=HI_RES_MODEL_NAME,
+    )
+    return "\n".join([el.text for el in elements if el.text])
 
 
 def normal_extract_text(path):
     """
     Basic text extraction without special handling for columns.
     Accepts either a file path (string) or binary data (bytes).
+    Pages are partitioned in parallel, see map_pages.
     """
 
     try:
-        # If path is bytes, wrap it in BytesIO to create a file-like object
-        if isinstance(path, bytes):
-            file_obj = BytesIO(path)
-            elements = partition_pdf(
-                file=file_obj, strategy="hi_res", infer_table_structure=True
-            )
-        else:
-            # Otherwise treat it as a file path
-            elements = partition_pdf(
-                filename=path, strategy="hi_res", infer_table_structure=True
-            )
-        text = "\n".join([el.text for el in elements if el.text])
+        # Make sure the layout model is loaded once per worker, partition_pdf
+        # picks the already loaded instance up by name
+        get_layout_model()
+        page_texts = map_pages(_partition_page, split_pdf_pages(path))
+        text = "\n".join(page_text for page_text in page_texts if page_text)
 
     except Exception as e:
         print(f"Error during PDF partitioning: {e}")
@@ -33,6 +120,44 @@ def normal_extract_text(path):
     return text.strip()
 
 
+def build_lines(tops, lefts, threshold):
+    """
+    Group positioned items (words or blocks) into lines in one sweep.
+    Items are sorted top to bottom once, then each one either joins the current
+    line, when it is within threshold of the line's running average top, or
+    starts a new line. Returns one index array per line, lines top to bottom and
+    items in a line left to right.
+    """
+    tops = np.asarray(tops, dtype=float)
+    lefts = np.asarray(lefts, dtype=float)
+    if not len(tops):
+        return []
+
+    order = np.lexsort((lefts, tops))
+    sorted_tops = tops[order].tolist()
+    line_ids = np.empty(len(order), dtype=np.intp)
+    line_ids[0] = 0
+    line = 0
+    total = sorted_tops[0]
+    count = 1
+    for i in range(1, len(sorted_tops)):
+        top = sorted_tops[i]
+        if abs(top - total / count) <= threshold:
+            total += top
+            count += 1
+        else:
+            line += 1
+            total = top
+            count = 1
+        line_ids[i] = line
+
+    # stable sort by line, then left to right inside each line
+    within = np.lexsort((lefts[order], line_ids))
+    order = order[within]
+    breaks = np.flatnonzero(np.diff(line_ids[within])) + 1
+    return np.split(order, breaks)
+
+
 def extract_text_with_column_awareness(structured_output):
     """
     Extract text from doctr output while handling multi-column layouts.
@@ -67,28 +192,17 @@ def extract_text_with_column_awareness(structured_output):
         # Use a tolerance for "same row" to handle slight vertical misalignments
         tolerance = 0.05  # 5% tolerance for same row
 
-        # Group blocks by approximate rows
-        rows = []
-        for block in blocks_with_pos:
-            placed = False
-            for row in rows:
-                # Check if block belongs to existing row (similar top position)
-                if abs(block["top"] - row[0]["top"]) <= tolerance:
-                    row.append(block)
-                    placed = True
-                    break
-            if not placed:
-                rows.append([block])
-
-        # Sort rows by top position, and blocks within each row by left position
-        rows.sort(key=lambda row: row[0]["top"])
-        for row in rows:
-            row.sort(key=lambda block: block["left"])
+        # Group blocks into rows and read each row left to right
+        rows = build_lines(
+            [block["top"] for block in blocks_with_pos],
+            [block["left"] for block in blocks_with_pos],
+            tolerance,
+        )
 
         # Concatenate text maintaining proper order
         for row in rows:
-            for block in row:
-                text += block["text"]
+            for index in row:
+                text += blocks_with_pos[index]["text"]
             text += "\n"  # Add extra line break between rows
 
     return text.strip()
@@ -136,63 +250,25 @@ def detect_columns_and_extract(structured_output):
         if not blocks_with_pos:
             continue
 
-        # Debug: Print block positions
-        print("DEBUG: Block positions:")
-        for i, block in enumerate(blocks_with_pos):
-            print(
-                f"Block {i}: left={block['left']:.3f}, center_x={block['center_x']:.3f}, text_preview='{block['text'][:30].replace(chr(10), ' ')}...'"
+        # Find the gutters from the block extents, a gap has to be at least
+        # 5% of the page width to count
+        boundaries = column_boundaries(
+            [block["left"] for block in blocks_with_pos],
+            [block["right"] for block in blocks_with_pos],
+            [block["center_x"] for block in blocks_with_pos],
+            min_width=0.05,
+        )
+        columns = split_columns(blocks_with_pos, boundaries)["columns"]
+
+        # Sort blocks within each column top to bottom, blocks side by side
+        # inside a column (a title and its dates) left to right
+        for col_idx, column in enumerate(columns):
+            lines = build_lines(
+                [block["top"] for block in column],
+                [block["left"] for block in column],
+                BLOCK_LINE_THRESHOLD,
             )
-
-        # More sophisticated column detection
-        # Sort blocks by left position to find natural column breaks
-        blocks_by_left = sorted(blocks_with_pos, key=lambda b: b["left"])
-
-        # Find significant gaps in the left positions
-        column_starts = [0.0]  # Always start with left margin
-
-        for i in range(1, len(blocks_by_left)):
-            prev_right = blocks_by_left[i - 1]["right"]
-            curr_left = blocks_by_left[i]["left"]
-            gap = curr_left - prev_right
-
-            # If there's a significant gap (> 5% of page width), it's likely a column boundary
-            if gap > 0.05:
-                # Add the midpoint as column boundary
-                column_starts.append((prev_right + curr_left) / 2)
-
-        # Remove duplicates and sort
-        column_starts = sorted(list(set(column_starts)))
-        column_starts.append(1.0)  # End of page
-
-        print(f"DEBUG: Detected column boundaries at: {column_starts}")
-
-        # Assign blocks to columns based on their center position
-        columns = [[] for _ in range(len(column_starts) - 1)]
-
-        for block in blocks_with_pos:
-            block_center = block["center_x"]
-            assigned = False
-
-            for col_idx in range(len(column_starts) - 1):
-                col_start = column_starts[col_idx]
-                col_end = column_starts[col_idx + 1]
-
-                if col_start <= block_center < col_end:
-                    columns[col_idx].append(block)
-                    assigned = True
-                    break
-
-            if not assigned:
-                # Fallback: assign to the last column
-                columns[-1].append(block)
-
-        # Debug: Show column assignments
-        for col_idx, col in enumerate(columns):
-            print(f"DEBUG: Column {col_idx} has {len(col)} blocks")
-
-        # Sort blocks within each column by vertical position (top to bottom)
-        for column in columns:
-            column.sort(key=lambda block: block["top"])
+            columns[col_idx] = [column[index] for line in lines for index in line]
 
         # Process columns separately to maintain proper column order
         column_texts = []
@@ -216,170 +292,291 @@ def detect_columns_and_extract(structured_output):
     return text.strip()
 
 
-def extract_text_word_level_columns(path, debug=False):
+def column_boundaries(lefts, rights, centers, min_width=0.02, min_share=0.1):
     """
-    Extract text by analyzing individual words and their positions to handle multi-column layouts.
-    This works better when OCR treats multiple columns as a single block.
+    Find the column gutters of a page from the horizontal extents of its words
+    or blocks (normalized [0,1]). A projection profile counts how many items
+    cover each x bin; every run of (nearly) empty bins between two covered ones
+    that is at least min_width wide is a candidate. Candidates are accepted
+    widest first as long as each column keeps min_share of the items, so right
+    aligned dates or a stray word don't make a column of their own.
+    Returns the sorted x positions of the accepted gutters.
+    """
+    lefts = np.asarray(lefts, dtype=float)
+    rights = np.asarray(rights, dtype=float)
+    centers = np.asarray(centers, dtype=float)
+    if not len(centers):
+        return np.empty(0)
+
+    bins = COLUMN_PROFILE_BINS
+    first = np.clip((lefts * bins).astype(np.intp), 0, bins - 1)
+    last = np.clip((rights * bins).astype(np.intp), 0, bins - 1)
+    delta = np.zeros(bins + 1, dtype=np.intp)
+    np.add.at(delta, first, 1)
+    np.add.at(delta, last + 1, -1)
+    profile = np.cumsum(delta[:-1])
+
+    max_crossing = int(len(centers) * COLUMN_VALLEY_MAX_SHARE)
+    empty = np.concatenate(([False], profile <= max_crossing, [False]))
+    edges = np.flatnonzero(np.diff(empty.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    # runs touching the page edge are margins, not gutters
+    valid = (starts > 0) & (ends < bins) & (ends - starts >= min_width * bins)
+    starts, ends = starts[valid], ends[valid]
+
+    boundaries = np.empty(0)
+    min_items = min_share * len(centers)
+    for i in np.argsort(starts - ends, kind="stable"):
+        candidate = np.sort(np.append(boundaries, (starts[i] + ends[i]) / 2 / bins))
+        counts = np.bincount(
+            np.searchsorted(candidate, centers), minlength=len(candidate) + 1
+        )
+        if counts.min() >= min_items:
+            boundaries = candidate
+    return boundaries
+
+
+def split_columns(words_with_pos, boundaries):
+    """
+    Page layout of positioned words split at the given gutters:
+    {"boundaries": [x, ...], "columns": [[word, ...], ...]} with columns left
+    to right and every word in the column its center falls in.
+    """
+    boundaries = np.asarray(boundaries, dtype=float)
+    centers = np.array([w["center_x"] for w in words_with_pos], dtype=float)
+    column_of = np.searchsorted(boundaries, centers, side="right")
+    columns = [[] for _ in range(len(boundaries) + 1)]
+    for word, column in zip(words_with_pos, column_of.tolist()):
+        columns[column].append(word)
+    return {
+        "boundaries": boundaries.tolist(),
+        "columns": [column for column in columns if column],
+    }
+
+
+def page_layout(words_with_pos, min_width=0.02, min_share=0.1):
     """
+    Segment one page of positioned words into as many columns as it has.
+    """
+    boundaries = column_boundaries(
+        [w["left"] for w in words_with_pos],
+        [w["right"] for w in words_with_pos],
+        [w["center_x"] for w in words_with_pos],
+        min_width=min_width,
+        min_share=min_share,
+    )
+    return split_columns(words_with_pos, boundaries)
 
-    model = ocr_predictor(pretrained=True, assume_straight_pages=False)
-    # PDF
-    doc = DocumentFile.from_pdf(path)
-    # Analyze
-    result = model(doc)
 
-    structured_output = result.export()
-    text = ""
+def column_lines(words, line_threshold):
+    """
+    Lines of one column of positioned words, top to bottom.
+    """
+    lines = build_lines(
+        [w["top"] for w in words], [w["left"] for w in words], line_threshold
+    )
+    return [
+        Line(
+            " ".join(words[i]["text"] for i in line),
+            words[line[0]]["top"],
+            words[line[0]]["left"],
+        )
+        for line in lines
+    ]
+
+
+def layout_page(layout, line_threshold=0.015, number=1):
+    """
+    Page record of a page layout, see layout.Page.
+    """
+    return Page(
+        number,
+        [
+            Column(
+                column_lines(column, line_threshold),
+                min(w["left"] for w in column),
+                max(w["right"] for w in column),
+            )
+            for column in layout["columns"]
+        ],
+    )
 
-    for page in structured_output["pages"]:
-        # Collect all words with their positions
-        words_with_pos = []
 
-        for block in page["blocks"]:
-            for line in block["lines"]:
-                for word in line["words"]:
-                    if word["value"].strip():  # Only non-empty words
-                        word_geometry = word["geometry"]
-                        word_left = word_geometry[0][0]
-                        word_top = word_geometry[0][1]
-                        word_right = word_geometry[1][0]
-                        word_bottom = word_geometry[1][1]
-                        word_center_x = (word_left + word_right) / 2
-
-                        words_with_pos.append(
-                            {
-                                "text": word["value"],
-                                "left": word_left,
-                                "top": word_top,
-                                "right": word_right,
-                                "bottom": word_bottom,
-                                "center_x": word_center_x,
-                                "width": word_right - word_left,
-                            }
-                        )
-
-        if not words_with_pos:
-            continue
+def words_to_page(words_with_pos, debug=False, line_threshold=0.015, number=1):
+    """
+    Page record of one page of positioned words (normalized [0,1]
+    coordinates), with a multi-column layout split into its columns.
+    """
+    layout = page_layout(words_with_pos)
+    if debug:
+        print(
+            f"DEBUG: {len(layout['columns'])} column(s), "
+            f"boundaries at {layout['boundaries']}"
+        )
+    return layout_page(layout, line_threshold, number)
 
-        # Analyze x-position distribution to detect columns
-        x_positions = [w["center_x"] for w in words_with_pos]
-        x_positions.sort()
 
-        # Find the main gap that indicates column separation
-        # Look for the largest gap in x-positions
-        max_gap = 0
-        column_boundary = None
+def ocr_page_words(page):
+    """
+    Positioned words of one page of doctr's exported output.
+    """
+    words_with_pos = []
+    for block in page["blocks"]:
+        for line in block["lines"]:
+            for word in line["words"]:
+                if word["value"].strip():  # Only non-empty words
+                    word_geometry = word["geometry"]
+                    word_left = word_geometry[0][0]
+                    word_top = word_geometry[0][1]
+                    word_right = word_geometry[1][0]
+                    word_bottom = word_geometry[1][1]
+                    word_center_x = (word_left + word_right) / 2
+
+                    words_with_pos.append(
+                        {
+                            "text": word["value"],
+                            "left": word_left,
+                            "top": word_top,
+                            "right": word_right,
+                            "bottom": word_bottom,
+                            "center_x": word_center_x,
+                            "width": word_right - word_left,
+                        }
+                    )
+    return words_with_pos
 
-        for i in range(1, len(x_positions)):
-            gap = x_positions[i] - x_positions[i - 1]
-            if gap > max_gap:
-                max_gap = gap
-                column_boundary = (x_positions[i] + x_positions[i - 1]) / 2
 
-        if debug:
-            print(
-                f"DEBUG: Largest gap is {max_gap:.3f} at position {column_boundary:.3f}"
-            )
+def extract_document_word_level_columns(path, debug=False):
+    """
+    OCR the PDF and rebuild every page from word positions, see
+    extract_text_word_level_columns. Returns a layout.Document.
+    Pages are recognized in parallel, see map_pages.
+    """
 
-        # If there's a significant gap (> 5% of page width), treat as multi-column
-        if max_gap > 0.05:
-            if debug:
-                print("DEBUG: Multi-column layout detected")
+    model = get_ocr_predictor()
+
+    def ocr_page(page_pdf):
+        # Analyze
+        result = model(DocumentFile.from_pdf(page_pdf))
+        pages = []
+        for page in result.export()["pages"]:
+            words_with_pos = ocr_page_words(page)
+            if words_with_pos:
+                pages.append(words_to_page(words_with_pos, debug=debug))
+        return pages
+
+    page_results = map_pages(
+        ocr_page,
+        split_pdf_pages(path),
+        size=lambda pages: sum(len(page.text()) for page in pages),
+    )
+    pages = [page for result in page_results for page in result]
+    for number, page in enumerate(pages, start=1):
+        page.number = number
+    return Document(pages, "ocr")
 
-            # Separate words into left and right columns
-            left_column_words = [
-                w for w in words_with_pos if w["center_x"] < column_boundary
-            ]
-            right_column_words = [
-                w for w in words_with_pos if w["center_x"] >= column_boundary
-            ]
 
-            def reconstruct_text_from_words(words):
-                if not words:
-                    return ""
-
-                # Sort words by position (top to bottom, left to right)
-                words.sort(key=lambda w: (w["top"], w["left"]))
-
-                # Group words into lines based on vertical position
-                lines = []
-                current_line = []
-                line_threshold = 0.015  # 1.5% tolerance for same line
-
-                for word in words:
-                    if not current_line:
-                        current_line = [word]
-                    else:
-                        # Check if word is on the same line as current line
-                        avg_top = sum(w["top"] for w in current_line) / len(
-                            current_line
-                        )
-                        if abs(word["top"] - avg_top) <= line_threshold:
-                            current_line.append(word)
-                        else:
-                            # Finish current line and start new one
-                            if current_line:
-                                current_line.sort(
-                                    key=lambda w: w["left"]
-                                )  # Sort words in line left to right
-                                lines.append(current_line)
-                            current_line = [word]
-
-                # Don't forget the last line
-                if current_line:
-                    current_line.sort(key=lambda w: w["left"])
-                    lines.append(current_line)
-
-                # Build text from lines
-                result = ""
-                for line in lines:
-                    line_text = " ".join([w["text"] for w in line])
-                    result += line_text + "\n"
-
-                return result.strip()
-
-            left_text = reconstruct_text_from_words(left_column_words)
-            right_text = reconstruct_text_from_words(right_column_words)
-
-            if debug:
-                print(f"DEBUG: Left column: {len(left_column_words)} words")
-                print(f"DEBUG: Right column: {len(right_column_words)} words")
-
-            # For now, combine columns side by side - you can modify this format as needed
-            text += left_text + "\n\n" + right_text + "\n"
+def extract_text_word_level_columns(path, debug=False):
+    """
+    Extract text by analyzing individual words and their positions to handle multi-column layouts.
+    This works better when OCR treats multiple columns as a single block.
+    """
+    return extract_document_word_level_columns(path, debug=debug).text()
 
-        else:
-            if debug:
-                print("DEBUG: Single column layout detected")
-            # Single column - reconstruct normally
-            words_with_pos.sort(key=lambda w: (w["top"], w["left"]))
-
-            lines = []
-            current_line = []
-            line_threshold = 0.015
-
-            for word in words_with_pos:
-                if not current_line:
-                    current_line = [word]
-                else:
-                    avg_top = sum(w["top"] for w in current_line) / len(current_line)
-                    if abs(word["top"] - avg_top) <= line_threshold:
-                        current_line.append(word)
-                    else:
-                        if current_line:
-                            current_line.sort(key=lambda w: w["left"])
-                            lines.append(current_line)
-                        current_line = [word]
-
-            if current_line:
-                current_line.sort(key=lambda w: w["left"])
-                lines.append(current_line)
-
-            for line in lines:
-                line_text = " ".join([w["text"] for w in line])
-                text += line_text + "\n"
 
-    return text.strip()
+def _as_file(path):
+    # pdfminer / pdfplumber need a fresh file object for every pass over bytes
+    return BytesIO(path) if isinstance(path, bytes) else path
+
+
+def text_layer_words(path, max_pages=EXTRACTION_MAX_PAGES):
+    """
+    Positioned words of the first max_pages pages of the PDF text layer, in
+    the same normalized [0,1] format words_to_page uses for OCR output.
+    """
+    pages = []
+    with pdfplumber.open(_as_file(path)) as pdf:
+        for page in pdf.pages[: max_pages or None]:
+            words_with_pos = []
+            for word in page.extract_words():
+                word_left = word["x0"] / page.width
+                word_right = word["x1"] / page.width
+                words_with_pos.append(
+                    {
+                        "text": word["text"],
+                        "left": word_left,
+                        "top": word["top"] / page.height,
+                        "right": word_right,
+                        "bottom": word["bottom"] / page.height,
+                        "center_x": (word_left + word_right) / 2,
+                        "width": word_right - word_left,
+                    }
+                )
+            pages.append(words_with_pos)
+    return pages
+
+
+def garbage_ratio(text):
+    """
+    Share of non-whitespace characters that point to a broken text layer:
+    unmapped glyphs like "(cid:12)", replacement and control characters.
+    """
+    chars = [c for c in text if not c.isspace()]
+    if not chars:
+        return 1.0
+    garbage = sum(1 for c in chars if c == "\ufffd" or not c.isprintable())
+    garbage += sum(len(m) for m in re.findall(r"\(cid:\d+\)", text))
+    return min(1.0, garbage / len(chars))
+
+
+def extract_document_tiered(path):
+    """
+    Extraction router: use the PDF text layer when it is good enough and only
+    fall back to hi_res layout analysis / OCR for scanned or broken documents.
+    Returns a layout.Document whose tier is "text", "text_columns", "hi_res"
+    or "ocr".
+    """
+    try:
+        pages = text_layer_words(path)
+        text = extract_pdf_text(_as_file(path), EXTRACTION_MAX_PAGES).strip()
+    except Exception as e:
+        print(f"Error reading PDF text layer: {e}")
+        pages = []
+        text = ""
+
+    page_count = max(len(pages), 1)
+    char_count = sum(1 for c in text if not c.isspace())
+    ratio = garbage_ratio(text)
+
+    if char_count / page_count >= MIN_CHARS_PER_PAGE and ratio <= MAX_GARBAGE_RATIO:
+        # pdfminer can interleave side by side columns, rebuild pages with
+        # columns from word positions instead
+        layouts = [page_layout(words) for words in pages]
+        if any(len(layout["columns"]) > 1 for layout in layouts):
+            layout_pages = []
+            for number, (words, layout) in enumerate(zip(pages, layouts), start=1):
+                if not words:
+                    continue
+                # text layer lines can be closer than the OCR default allows
+                heights = [w["bottom"] - w["top"] for w in words]
+                layout_pages.append(
+                    layout_page(
+                        layout,
+                        line_threshold=float(np.median(heights)) / 2,
+                        number=number,
+                    )
+                )
+            return Document(layout_pages, "text_columns")
+        return Document.from_text(text, "text")
+
+    print(
+        f"Text layer rejected ({char_count} chars over {page_count} pages, "
+        f"garbage ratio {ratio:.2f}), falling back to hi_res"
+    )
+    text = normal_extract_text(path)
+    if text:
+        return Document.from_text(text, "hi_res")
+    return extract_document_word_level_columns(path)
 
 
 # # test on resumes/in.pdf
@@ -0,0 +1,60 @@
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from extract2 import extract_document_tiered
+from layout import Document
+import model_registry
+import multiprocessing
+import os
+import threading
+
+load_dotenv()
+
+# "thread" runs extraction in the calling thread, "process" in a pool of child
+# processes so layout analysis / OCR isn't limited to one core by the GIL
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "thread")
+EXTRACTION_PROCESSES = int(os.getenv("EXTRACTION_PROCESSES", str(os.cpu_count() or 1)))
+# Replace a child after this many extractions to give back memory the models leak
+EXTRACTION_MAX_TASKS_PER_CHILD = int(os.getenv("EXTRACTION_MAX_TASKS_PER_CHILD", "50"))
+
+_pool = None
+_lock = threading.Lock()
+
+
+def _init_child():
+    # Load the models once per child, before it takes its first job
+    try:
+        model_registry.warm_up()
+    except Exception as e:
+        print(f"Error preloading models in extraction process {os.getpid()}: {e}")
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=EXTRACTION_PROCESSES,
+                # torch / onnxruntime don't survive fork, start clean children
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_child,
+                max_tasks_per_child=EXTRACTION_MAX_TASKS_PER_CHILD,
+            )
+        return _pool
+
+
+def extract_document(data: bytes | str) -> Document:
+    """
+    Run the tiered extractor on the PDF bytes or file path according to
+    EXTRACTION_MODE.
+    """
+    if EXTRACTION_MODE == "process":
+        return get_pool().submit(extract_document_tiered, data).result()
+    return extract_document_tiered(data)
+
+
+def shutdown():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,245 @@
+import json
+import re
+import msgpack
+
+# Bump when the serialized layout changes so cached documents are rebuilt
+LAYOUT_FORMAT_VERSION = 1
+
+# Headings that start a resume section, by section name. Only skills,
+# experience and education are used downstream, the others are there so the
+# sections before them end at the right line.
+SECTION_HEADINGS = {
+    "skills": [
+        "skills",
+        "technical skills",
+        "key skills",
+        "core skills",
+        "skills and abilities",
+        "skills and tools",
+        "core competencies",
+        "competencies",
+        "technologies",
+        "tech stack",
+        "tools and technologies",
+        "expertise",
+        "areas of expertise",
+    ],
+    "experience": [
+        "experience",
+        "work experience",
+        "professional experience",
+        "relevant experience",
+        "employment",
+        "employment history",
+        "work history",
+        "career history",
+        "professional background",
+    ],
+    "education": [
+        "education",
+        "educational background",
+        "education and training",
+        "academic background",
+        "academic qualifications",
+        "qualifications",
+    ],
+    "contact": [
+        "contact",
+        "contact information",
+        "contact details",
+        "personal information",
+        "personal details",
+    ],
+    "summary": [
+        "summary",
+        "professional summary",
+        "profile",
+        "about me",
+        "objective",
+        "career objective",
+    ],
+    "projects": ["projects", "personal projects", "key projects"],
+    "certifications": [
+        "certifications",
+        "certificates",
+        "licenses and certifications",
+        "training",
+    ],
+    "awards": ["awards", "achievements", "honors and awards"],
+    "languages": ["languages"],
+    "references": ["references"],
+    "interests": ["interests", "hobbies", "hobbies and interests"],
+}
+
+_HEADING_SECTIONS = {
+    heading: section
+    for section, headings in SECTION_HEADINGS.items()
+    for heading in headings
+}
+# Longest heading is 4 words, anything longer is body text
+_MAX_HEADING_WORDS = 4
+
+
+def heading_section(text: str) -> str | None:
+    """
+    Section a line starts when it is a heading ("WORK EXPERIENCE",
+    "Skills:", "Skills: Python, SQL"), otherwise None.
+    """
+    heading = text.split(":", 1)[0]
+    words = re.sub(r"[^a-z ]+", " ", heading.lower().replace("&", " and ")).split()
+    if not words or len(words) > _MAX_HEADING_WORDS:
+        return None
+    return _HEADING_SECTIONS.get(" ".join(words))
+
+
+class Line:
+    """
+    One line of text. top / left are normalized page coordinates, or None for
+    text without positions. section is the section the line is in and header
+    whether the line is that section's heading.
+    """
+
+    __slots__ = ("text", "top", "left", "section", "header")
+
+    def __init__(self, text: str, top: float | None = None, left: float | None = None):
+        self.text = text
+        self.top = top
+        self.left = left
+        self.section = None
+        self.header = False
+
+
+class Column:
+    __slots__ = ("left", "right", "lines")
+
+    def __init__(self, lines: list[Line], left: float = 0.0, right: float = 1.0):
+        self.left = left
+        self.right = right
+        self.lines = lines
+
+    def text(self) -> str:
+        return "\n".join(line.text for line in self.lines)
+
+
+class Page:
+    __slots__ = ("number", "columns")
+
+    def __init__(self, number: int, columns: list[Column]):
+        self.number = number
+        self.columns = columns
+
+    def text(self) -> str:
+        if not self.columns:
+            return ""
+        return "\n\n".join(column.text() for column in self.columns) + "\n"
+
+
+class Document:
+    """
+    Extracted resume: pages of columns of lines in reading order, with the
+    section every line belongs to. text() gives the same flat text the
+    extractors used to return.
+    """
+
+    __slots__ = ("pages", "tier")
+
+    def __init__(self, pages: list[Page], tier: str = ""):
+        self.pages = pages
+        self.tier = tier
+        self._mark_sections()
+
+    @classmethod
+    def from_text(cls, text: str, tier: str = ""):
+        # extractors without word positions: one page, one column
+        lines = [Line(line) for line in text.split("\n")]
+        return cls([Page(1, [Column(lines)])], tier)
+
+    def lines(self):
+        for page in self.pages:
+            for column in page.columns:
+                yield from column.lines
+
+    def _mark_sections(self):
+        section = None
+        for page in self.pages:
+            for index, column in enumerate(page.columns):
+                # a column next to the first one (a sidebar) doesn't continue
+                # whatever section the previous column ended in
+                if index > 0:
+                    section = None
+                for line in column.lines:
+                    heading = heading_section(line.text)
+                    if heading is not None:
+                        section = heading
+                    line.section = section
+                    line.header = heading is not None
+
+    def text(self) -> str:
+        return "".join(page.text() for page in self.pages).strip()
+
+    def headers(self) -> list[tuple[str, str]]:
+        """
+        (section, heading text) of every detected heading, in reading order.
+        """
+        return [(line.section, line.text) for line in self.lines() if line.header]
+
+    def sections(self) -> dict[str, str]:
+        """
+        Text of every section found, headings included. Lines before the
+        first heading are under None.
+        """
+        sections = {}
+        for line in self.lines():
+            sections.setdefault(line.section, []).append(line.text)
+        return {section: "\n".join(lines) for section, lines in sections.items()}
+
+    def to_dict(self) -> dict:
+        # sections are derived from the text, so they aren't stored
+        return {
+            "version": LAYOUT_FORMAT_VERSION,
+            "tier": self.tier,
+            "pages": [
+                [
+                    page.number,
+                    [
+                        [
+                            column.left,
+                            column.right,
+                            [[line.text, line.top, line.left] for line in column.lines],
+                        ]
+                        for column in page.columns
+                    ],
+                ]
+                for page in self.pages
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        if data.get("version") != LAYOUT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported layout version {data.get('version')}")
+        pages = [
+            Page(
+                number,
+                [
+                    Column([Line(*line) for line in lines], left, right)
+                    for left, right, lines in columns
+                ],
+            )
+            for number, columns in data["pages"]
+        ]
+        return cls(pages, data["tier"])
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str | bytes):
+        return cls.from_dict(json.loads(text))
+
+    def to_msgpack(self) -> bytes:
+        return msgpack.packb(self.to_dict())
+
+    @classmethod
+    def from_msgpack(cls, data: bytes):
+        return cls.from_dict(msgpack.unpackb(data))
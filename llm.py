@@ -0,0 +1,103 @@
+from ollama import Client
+from dotenv import load_dotenv
+from pydantic import BaseModel, ValidationError
+from utils import clean_response, repair_json
+import os
+import threading
+
+load_dotenv()
+
+# Cap on concurrent requests sent to a single Ollama host, shared by every
+# caller in the worker process (extraction and scoring alike).
+OLLAMA_MAX_IN_FLIGHT = int(os.getenv("OLLAMA_MAX_IN_FLIGHT", "3"))
+# Times a structured call asks the model again when its output can't be
+# validated even after the local JSON repair
+STRUCTURED_OUTPUT_RETRIES = int(os.getenv("STRUCTURED_OUTPUT_RETRIES", "1"))
+
+_clients = {}
+_semaphores = {}
+_lock = threading.Lock()
+
+
+def get_client(host: str | None = None) -> Client:
+    """
+    Return a shared Ollama client for the given host.
+    When host is None the client falls back to OLLAMA_HOST / localhost.
+    """
+    with _lock:
+        if host not in _clients:
+            _clients[host] = Client(host=host)
+        return _clients[host]
+
+
+def _host_semaphore(client: Client) -> threading.BoundedSemaphore:
+    host_key = str(client._client.base_url)
+    with _lock:
+        if host_key not in _semaphores:
+            _semaphores[host_key] = threading.BoundedSemaphore(OLLAMA_MAX_IN_FLIGHT)
+        return _semaphores[host_key]
+
+
+def _chat(model, messages, think=False, host=None, format=None):
+    client = get_client(host)
+    with _host_semaphore(client):
+        return client.chat(model=model, messages=messages, think=think, format=format)
+
+
+def embed(model: str, inputs: list[str], host: str | None = None) -> list[list[float]]:
+    """
+    Embedding vectors of inputs from an embedding model (/api/embed), in one
+    request, sharing the host's request slots with chat calls.
+    """
+    client = get_client(host)
+    with _host_semaphore(client):
+        return client.embed(model=model, input=inputs)["embeddings"]
+
+
+def _validate(schema: type[BaseModel], text: str):
+    try:
+        return schema.model_validate_json(text), None
+    except ValidationError as e:
+        error = e
+    # fix the JSON locally before spending another generation on it
+    try:
+        return schema.model_validate_json(repair_json(text)), None
+    except ValidationError:
+        return None, error
+
+
+def chat_structured(
+    model: str,
+    content: str,
+    schema: type[BaseModel],
+    think: bool = False,
+    host: str | None = None,
+):
+    """
+    Send a single user message with the response constrained to schema (its
+    JSON schema goes in Ollama's format=) and validate the answer into it.
+    Output that doesn't validate is repaired locally first; only when that
+    fails too the model is shown its answer and the error and asked again, up
+    to STRUCTURED_OUTPUT_RETRIES times.
+    Returns (parsed model or None, last raw response).
+    """
+    messages = [{"role": "user", "content": content}]
+    format = schema.model_json_schema()
+    for attempt in range(STRUCTURED_OUTPUT_RETRIES + 1):
+        response = _chat(model, messages, think, host, format)
+        text = clean_response(response["message"]["content"])
+        parsed, error = _validate(schema, text)
+        if parsed is not None:
+            return parsed, response
+        print(
+            f"Invalid {schema.__name__} from {model} (attempt {attempt + 1}): {error}"
+        )
+        messages = messages[:1] + [
+            {"role": "assistant", "content": text},
+            {
+                "role": "user",
+                "content": f"That response is invalid: {error}\n"
+                "Return only the corrected JSON.",
+            },
+        ]
+    return None, response
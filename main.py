@@ -1,36 +1,178 @@
 from bullmq import Worker
 import asyncio
 import signal
-from minio import Minio
 from dotenv import load_dotenv
 from ai import extract_resume_data
 import os
 from api import (
+    api_client,
+    async_api_client,
     set_status,
-    update_parsed_data,
-    update_matched_skills,
-    update_applicant_experience_relevance,
-    update_applicant_scores,
+    WriteBuffer,
+    batch_succeeded,
     queue_score_resume,
+    update_applicant_results_bulk,
 )
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import llm
+from cache import normalize_key_part
 from scoring import (
     score_education_match,
     score_skills_match,
+    score_skills_match_batch,
     score_experience_years,
-    tz_score,
+    score_timezone_match,
+    skills_cache_key,
+    judge_experience_relevance,
+    mark_experience_relevance,
+    compute_overall_score,
+    compute_overall_scores,
+    SCORE_WEIGHTS,
 )
-from extract2 import extract_text_word_level_columns, normal_extract_text
+from experience_engine import relevant_bounds, score_experience
+from extract2 import EXTRACTOR_VERSIONS
+from cache import pdf_text_cache, pdf_text_cache_key
+import model_registry
+import extraction_pool
+from storage import fetch_resume, ResumeFile, ResumeTooLarge
+from layout import Document
+from pipeline import Pipeline, Stage
 
 # Load environment variables from .env file
 load_dotenv()
 
-minio_client = Minio(
-    os.getenv("MINIO_ENDPOINT") + ":" + os.getenv("MINIO_PORT"),
-    access_key=os.getenv("MINIO_ACCESS_KEY"),
-    secret_key=os.getenv("MINIO_SECRET_KEY"),
-    secure=False,  # Use True for HTTPS, False for HTTP
+# Model calls in flight at once while scoring a whole job in one pass
+BATCH_SCORING_CONCURRENCY = int(
+    os.getenv("BATCH_SCORING_CONCURRENCY", str(llm.OLLAMA_MAX_IN_FLIGHT))
 )
+# Distinct experience titles judged per exp_relevance_eval call in a batch
+BATCH_EXPERIENCE_TITLES_PER_CALL = int(
+    os.getenv("BATCH_EXPERIENCE_TITLES_PER_CALL", "20")
+)
+# Distinct skill sets scored per skills_score_batch call in a batch, 1 uses
+# one skills_score call per skill set
+BATCH_SKILLS_PER_CALL = int(os.getenv("BATCH_SKILLS_PER_CALL", "4"))
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+QUEUE_NAME = os.getenv("QUEUE_NAME", "cvrankify-jobs")
+# Point these at different queues to run extraction and scoring on separate
+# workers, otherwise both job types share QUEUE_NAME
+EXTRACTION_QUEUE_NAME = os.getenv("EXTRACTION_QUEUE_NAME", QUEUE_NAME)
+SCORING_QUEUE_NAME = os.getenv("SCORING_QUEUE_NAME", QUEUE_NAME)
+# Jobs of each type this worker runs at once; extraction is CPU bound (OCR),
+# scoring mostly waits on the LLM
+EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", "1"))
+SCORING_CONCURRENCY = int(os.getenv("SCORING_CONCURRENCY", "4"))
+# Run process-resume jobs through the staged pipeline (fetch, extract, LLM,
+# persist) so downloads, OCR and model calls of consecutive resumes overlap
+RESUME_PIPELINE = os.getenv("RESUME_PIPELINE", "false").lower() == "true"
+# Resumes each pipeline stage works on at once; extraction uses
+# EXTRACTION_CONCURRENCY
+PIPELINE_FETCH_CONCURRENCY = int(os.getenv("PIPELINE_FETCH_CONCURRENCY", "2"))
+PIPELINE_LLM_CONCURRENCY = int(
+    os.getenv("PIPELINE_LLM_CONCURRENCY", str(llm.OLLAMA_MAX_IN_FLIGHT))
+)
+PIPELINE_PERSIST_CONCURRENCY = int(os.getenv("PIPELINE_PERSIST_CONCURRENCY", "2"))
+# Resumes allowed to wait in front of each stage
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+# Seconds between pipeline stats lines in the log, 0 to disable
+PIPELINE_STATS_INTERVAL = float(os.getenv("PIPELINE_STATS_INTERVAL", "60"))
+# Job types this node handles, e.g. "extraction" on CPU nodes only
+WORKER_ROLES = [
+    role.strip()
+    for role in os.getenv("WORKER_ROLES", "extraction,scoring").split(",")
+    if role.strip()
+]
+
+JOB_TYPES = {
+    "process-resume": "extraction",
+    "score-applicant": "scoring",
+    "score-job-batch": "scoring",
+    "rescore-weights": "scoring",
+}
+
+ROLE_QUEUES = {
+    "extraction": EXTRACTION_QUEUE_NAME,
+    "scoring": SCORING_QUEUE_NAME,
+}
+
+
+def check_worker_roles():
+    """
+    Refuse to start when this worker consumes a queue that also carries job
+    types it doesn't run: BullMQ has no way to hand such a job back, it would
+    only fail (for good with a single attempt) or bounce between workers.
+    """
+    for role in WORKER_ROLES:
+        if role not in ROLE_QUEUES:
+            raise SystemExit(f"Unknown worker role {role!r} in WORKER_ROLES")
+    for role in WORKER_ROLES:
+        queue_name = ROLE_QUEUES[role]
+        other_roles = [
+            other
+            for other, other_queue in ROLE_QUEUES.items()
+            if other_queue == queue_name and other not in WORKER_ROLES
+        ]
+        if other_roles:
+            raise SystemExit(
+                f"Queue {queue_name} also carries {', '.join(other_roles)} jobs, "
+                f"which WORKER_ROLES={','.join(WORKER_ROLES)} doesn't run. Give "
+                "each role its own queue (EXTRACTION_QUEUE_NAME / "
+                "SCORING_QUEUE_NAME) or run every role on this worker."
+            )
+
+
+job_type_limits = {
+    "extraction": asyncio.Semaphore(EXTRACTION_CONCURRENCY),
+    "scoring": asyncio.Semaphore(SCORING_CONCURRENCY),
+}
+
+
+def extract_resume_document(resume: ResumeFile) -> Document:
+    # Retried jobs and duplicate uploads reuse the text extracted the first time
+    extractor = "extract_document_tiered"
+    cache_key = pdf_text_cache_key(
+        resume.sha256, extractor, EXTRACTOR_VERSIONS[extractor]
+    )
+    cached = pdf_text_cache.get(cache_key)
+    if cached is not None:
+        print(f"PDF text cache hit: {cache_key}")
+        try:
+            return Document.from_msgpack(cached)
+        except Exception as e:
+            print(f"Ignoring unreadable cached layout {cache_key}: {e}")
+
+    document = extraction_pool.extract_document(resume.source)
+    # Empty text means extraction failed, don't cache it so a retry tries again
+    if document.text():
+        pdf_text_cache.set(cache_key, document.to_msgpack())
+    return document
+
+
+def save_parsed_data(applicant_id, resume_data):
+    # parsed data goes out as one batched request, the statuses only after it
+    # was saved since batched procedures run concurrently on the server
+    writes = WriteBuffer(api_client, flush_interval=0)
+    writes.update_parsed_data(applicant_id, resume_data)
+    status_code, results = writes.flush()
+    if not batch_succeeded(results):
+        status_code, resp_json = set_status(applicant_id, "failed")
+        print(f"Saving parsed data failed, set status to failed: {status_code}")
+        return
+    status_code, resp_json = set_status(applicant_id, "processing")
+    print(f"Set status to processing: {status_code}, {resp_json}")
+    # SCORE RESUME, only after the parsed data is saved since scoring reads it
+    status_code, resp_json = queue_score_resume(applicant_id)
+    print(f"Queued score resume: {status_code}, {resp_json}")
+
+
+def reject_resume(job, error):
+    print(f"Rejected resume for job {job.id}: {error}")
+    status_code, resp_json = set_status(job.data.get("applicantId"), "failed")
+    print(f"Set status to failed: {status_code}, {resp_json}")
 
 
 def handle_extraction(job):
@@ -41,26 +183,85 @@ def handle_extraction(job):
     resume_path = job.data.get("resumePath")
 
     try:
-        response = minio_client.get_object(os.getenv("MINIO_BUCKET_NAME"), resume_path)
-        data = response.read()
-        # resume_text = extract_text_word_level_columns(data)
-        resume_text = normal_extract_text(data)
-        print("Extracted Resume Text:", resume_text)
-        resume_data = extract_resume_data(resume_text)
-        status_code, resp_json = set_status(applicant_id, "parsing")
-        print(f"Set status to parsing: {status_code}, {resp_json}")
-        status_code, resp_json = update_parsed_data(applicant_id, resume_data)
-        print(f"Updated parsed data: {status_code}, {resp_json}")
-        status_code, resp_json = set_status(applicant_id, "processing")
-        print(f"Set status to processing: {status_code}, {resp_json}")
-        # SCORE RESUME
-        status_code, resp_json = queue_score_resume(applicant_id)
-        print(f"Queued score resume: {status_code}, {resp_json}")
+        with fetch_resume(resume_path) as resume:
+            # resume_text = extract_text_word_level_columns(resume.source)
+            document = extract_resume_document(resume)
+        resume_text = document.text()
+        print(f"Extracted Resume Text ({document.tier}):", resume_text)
+        resume_data = extract_resume_data(document)
+        save_parsed_data(applicant_id, resume_data)
+        return document.tier
+    except ResumeTooLarge as e:
+        reject_resume(job, e)
+    except Exception as e:
+        print(f"Error processing job {job.id}: {e}")
+
+
+# Stages of the resume pipeline, each takes the previous stage's result
+def fetch_stage(job):
+    print(f"Processing job {job.id} with data: {job.data}")
+    return job, fetch_resume(job.data.get("resumePath"))
+
+
+def extract_stage(fetched):
+    job, resume = fetched
+    with resume:
+        document = extract_resume_document(resume)
+    print(f"Extracted Resume Text ({document.tier}):", document.text())
+    return job, document
+
+
+def discard_fetched(fetched):
+    # fetch_stage results dropped before extraction, the spool file goes too
+    _, resume = fetched
+    resume.close()
+
+
+def llm_stage(extracted):
+    job, document = extracted
+    return job, extract_resume_data(document), document.tier
+
+
+def persist_stage(parsed):
+    job, resume_data, tier = parsed
+    save_parsed_data(job.data.get("applicantId"), resume_data)
+    return tier
+
+
+def make_resume_pipeline() -> Pipeline:
+    return Pipeline(
+        [
+            Stage(
+                "fetch", fetch_stage, PIPELINE_FETCH_CONCURRENCY, PIPELINE_QUEUE_SIZE
+            ),
+            Stage(
+                "extract",
+                extract_stage,
+                EXTRACTION_CONCURRENCY,
+                PIPELINE_QUEUE_SIZE,
+                cleanup=discard_fetched,
+            ),
+            Stage("llm", llm_stage, PIPELINE_LLM_CONCURRENCY, PIPELINE_QUEUE_SIZE),
+            Stage(
+                "persist",
+                persist_stage,
+                PIPELINE_PERSIST_CONCURRENCY,
+                PIPELINE_QUEUE_SIZE,
+            ),
+        ]
+    )
+
+
+resume_pipeline = None
+
+
+async def handle_extraction_pipelined(job):
+    try:
+        return await resume_pipeline.submit(job)
+    except ResumeTooLarge as e:
+        await asyncio.to_thread(reject_resume, job, e)
     except Exception as e:
         print(f"Error processing job {job.id}: {e}")
-    finally:
-        response.close()
-        response.release_conn()
 
 
 def score_applicant(job):
@@ -70,6 +271,9 @@ def score_applicant(job):
     applicant_id = job.data.get("applicantId")
     applicant_data = job.data.get("applicantData")
     job_data = job.data.get("jobData")
+    # all results for this applicant are sent together as one batched request
+    # when scoring is done, no timer sends part of them while a model runs
+    writes = WriteBuffer(api_client, flush_interval=0)
 
     # json parse data
     try:
@@ -107,8 +311,7 @@ def score_applicant(job):
             job_skills=job_skills, applicant_skills=applicant_skills
         )
         skills_match = skills_match_json.get("job_skills", [])
-        status_code, resp_json = update_matched_skills(applicant_id, skills_match)
-        print(f"Updated matched skills: {status_code}, {resp_json}")
+        writes.update_matched_skills(applicant_id, skills_match)
         print(f"Skills Score: {skills_score}")
 
         job_title = job_data.get("title")
@@ -134,39 +337,24 @@ def score_applicant(job):
         # print(f"Total Years with Months: {total_years_with_months}")
 
         # EXPERIENCE
-        status_code, resp_json = update_applicant_experience_relevance(
-            applicant_id, relevant_experience
-        )
-        # print(f"Updated experience relevance: {status_code}, {resp_json}")
+        writes.update_applicant_experience_relevance(applicant_id, relevant_experience)
 
         # TIMEZONE
-        applicant_timezone = applicant_data.get("parsedTimezone", "Unknown")
-        job_timezone = job_data.get("timezone", "Unknown")
-
-        if applicant_timezone != "Unknown" and job_timezone != "Unknown":
-            applicant_tz = applicant_timezone.split("GMT")[-1]
-            applicant_tz = float(applicant_tz)
-
-            job_tz = job_timezone.split("GMT")[-1]
-            job_tz = float(job_tz)
-
-            (timezone_score, hour_gap) = tz_score(applicant_tz, job_tz)
-        # print(f"Applicant Timezone: {applicant_timezone}, Job Timezone: {job_timezone}")
+        timezone_score = score_timezone_match(
+            applicant_data.get("parsedTimezone", "Unknown"),
+            job_data.get("timezone", "Unknown"),
+        )
         # print(f"Timezone Score: {timezone_score}")
 
         # OVERALL SCORE
         print(
             f"Skills Score: {skills_score}, Experience Score: {experience_score}, Education Score: {education_score}, Timezone Score: {timezone_score}"
         )
-        overall_score = (
-            float(skills_score) * float(job_data.get("skillsWeight", 0))
-            + float(experience_score) * float(job_data.get("experienceWeight", 0))
-            + float(education_score) * float(job_data.get("educationWeight", 0))
-            + float(timezone_score) * float(job_data.get("timezoneWeight", 0))
+        overall_score = compute_overall_score(
+            skills_score, experience_score, education_score, timezone_score, job_data
         )
-        overall_score = round(overall_score, 2)
 
-        status_code, resp_json = update_applicant_scores(
+        writes.update_applicant_scores(
             applicant_id,
             skills_score,
             experience_score,
@@ -175,9 +363,13 @@ def score_applicant(job):
             overall_score,
             total_years_with_months,
         )
+        status_code, resp_json = writes.flush()
         print(f"Updated applicant scores: {status_code}, {resp_json}")
-        status_code, resp_json = set_status(applicant_id, "completed")
-        print(f"Set status to completed: {status_code}, {resp_json}")
+        # batched procedures run concurrently, so "completed" only goes out
+        # once the results were written
+        status = "completed" if batch_succeeded(resp_json) else "failed"
+        status_code, resp_json = set_status(applicant_id, status)
+        print(f"Set status to {status}: {status_code}, {resp_json}")
 
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON data for job {job.id}: {e}")
@@ -187,18 +379,304 @@ def score_applicant(job):
     return None
 
 
+def score_job_batch(job):
+    """
+    Score all applicants of a job in one pass. The job is parsed once, every
+    distinct education pair, skill set and experience title is sent to the
+    models only once, and the results are written back in a single request.
+    """
+    job_id = job.data.get("jobId")
+    print(f"Batch scoring job {job_id} ({job.id})")
+
+    try:
+        job_data = json.loads(job.data.get("jobData"))
+        applicants = job.data.get("applicants")
+        if isinstance(applicants, str):
+            applicants = json.loads(applicants)
+    except json.JSONDecodeError as e:
+        print(f"Error parsing JSON data for job {job.id}: {e}")
+        return None
+
+    job_skills = job_data.get("skills").split(", ")
+    job_title = job_data.get("title")
+    job_relevant_experience_years = job_data.get("yearsOfExperience", 0)
+
+    def education_key(applicant_data):
+        return (
+            applicant_data.get("parsedHighestEducationDegree"),
+            normalize_key_part(applicant_data.get("parsedEducationField")),
+        )
+
+    def applicant_skills(applicant_data):
+        return (applicant_data.get("parsedSkills") or "").split(", ")
+
+    def applicant_experiences(applicant_data):
+        return applicant_data.get("experiences") or []
+
+    education_futures = {}
+    skill_sets = {}
+    experiences_by_title = {}
+    # (education key, skills key) of every applicant that could be read,
+    # the others are reported failed without holding up the rest of the job
+    applicant_keys = {}
+
+    with ThreadPoolExecutor(max_workers=BATCH_SCORING_CONCURRENCY) as pool:
+        for index, applicant_data in enumerate(applicants):
+            try:
+                education = education_key(applicant_data)
+                skills = applicant_skills(applicant_data)
+                skills_key = skills_cache_key("skills_score", job_skills, skills)
+                titles = {
+                    normalize_key_part(exp.get("jobTitle")): exp
+                    for exp in applicant_experiences(applicant_data)
+                }
+            except Exception as e:
+                print(f"Error reading applicant {applicant_data.get('id')}: {e}")
+                continue
+            applicant_keys[index] = (education, skills_key)
+
+            # EDUCATION
+            if education not in education_futures:
+                education_futures[education] = pool.submit(
+                    score_education_match,
+                    applicant_education_field=applicant_data.get(
+                        "parsedEducationField"
+                    ),
+                    applicant_highest_degree=applicant_data.get(
+                        "parsedHighestEducationDegree"
+                    ),
+                    job_education_field=job_data.get("educationField"),
+                    job_required_degree=job_data.get("educationDegree"),
+                )
+
+            # SKILLS
+            skill_sets.setdefault(skills_key, skills)
+
+            for title, exp in titles.items():
+                experiences_by_title.setdefault(title, exp)
+
+        # SKILLS: score every distinct skill set once, several applicants per
+        # skills_score_batch call
+        skill_keys = list(skill_sets)
+        batch_size = max(BATCH_SKILLS_PER_CALL, 1)
+        skills_futures = [
+            (
+                batch_keys,
+                pool.submit(
+                    score_skills_match_batch,
+                    job_skills,
+                    [skill_sets[key] for key in batch_keys],
+                ),
+            )
+            for batch_keys in (
+                skill_keys[i : i + batch_size]
+                for i in range(0, len(skill_keys), batch_size)
+            )
+        ]
+
+        # EXPERIENCE: judge every distinct title once, a few titles per call,
+        # so scoring each applicant below only reads the relevance table
+        unique_experiences = list(experiences_by_title.values())
+        relevance_futures = [
+            pool.submit(
+                judge_experience_relevance,
+                job_title,
+                unique_experiences[i : i + BATCH_EXPERIENCE_TITLES_PER_CALL],
+            )
+            for i in range(0, len(unique_experiences), BATCH_EXPERIENCE_TITLES_PER_CALL)
+        ]
+        relevance = {}
+        for future in relevance_futures:
+            try:
+                relevance.update(future.result())
+            except Exception as e:
+                print(f"Error judging experience relevance for job {job_id}: {e}")
+
+    skills_results = {}
+    for batch_keys, future in skills_futures:
+        try:
+            skills_results.update(zip(batch_keys, future.result()))
+        except Exception as e:
+            print(f"Error scoring skills for job {job_id}: {e}")
+
+    # EXPERIENCE: relevance comes from the judgements above, titles that
+    # couldn't be judged count as not relevant rather than being asked again
+    # one applicant at a time, and the years of every applicant are merged in
+    # one pass
+    experiences = {}
+    for index in applicant_keys:
+        applicant_data = applicants[index]
+        try:
+            relevant_experience = mark_experience_relevance(
+                job_title, applicant_experiences(applicant_data), relevance
+            )
+            experiences[index] = (
+                relevant_experience,
+                relevant_bounds(relevant_experience),
+            )
+        except Exception as e:
+            print(
+                f"Error reading experience of applicant {applicant_data.get('id')}: {e}"
+            )
+    (experience_years, experience_scores) = score_experience(
+        [bounds for _, bounds in experiences.values()], job_relevant_experience_years
+    )
+    experience_results = {
+        index: (relevant_experience, float(score), float(years))
+        for (index, (relevant_experience, _)), years, score in zip(
+            experiences.items(), experience_years, experience_scores
+        )
+    }
+
+    results = []
+    for index, applicant_data in enumerate(applicants):
+        applicant_id = applicant_data.get("id")
+        if index not in applicant_keys:
+            # leaving it out would keep the applicant "processing" forever
+            results.append({"applicantId": applicant_id, "statusAI": "failed"})
+            continue
+        try:
+            (education, skills_key) = applicant_keys[index]
+            education_score = round(education_futures[education].result(), 2)
+            (skills_score, skills_match_json) = skills_results[skills_key]
+
+            (relevant_experience, experience_score, total_years_with_months) = (
+                experience_results[index]
+            )
+            experience_score = round(experience_score, 2)
+
+            timezone_score = score_timezone_match(
+                applicant_data.get("parsedTimezone", "Unknown"),
+                job_data.get("timezone", "Unknown"),
+            )
+
+            results.append(
+                {
+                    "applicantId": applicant_id,
+                    "matchedSkills": skills_match_json.get("job_skills", []),
+                    "experiences": relevant_experience,
+                    "skillsScoreAI": skills_score,
+                    "experienceScoreAI": experience_score,
+                    "educationScoreAI": education_score,
+                    "timezoneScoreAI": timezone_score,
+                    "overallScoreAI": compute_overall_score(
+                        skills_score,
+                        experience_score,
+                        education_score,
+                        timezone_score,
+                        job_data,
+                    ),
+                    "parsedYearsOfExperience": total_years_with_months,
+                    "statusAI": "completed",
+                }
+            )
+        except Exception as e:
+            print(f"Unexpected error scoring applicant {applicant_id}: {e}")
+            # leaving it out would keep the applicant "processing" forever
+            results.append({"applicantId": applicant_id, "statusAI": "failed"})
+
+    scored = sum(result["statusAI"] == "completed" for result in results)
+    print(
+        f"Scored {scored}/{len(applicants)} applicants with "
+        f"{len(education_futures)} education, {len(skill_sets)} skills and "
+        f"{len(experiences_by_title)} experience title queries"
+    )
+    status_code, resp_json = update_applicant_results_bulk(job_id, results)
+    print(f"Updated applicant results: {status_code}, {resp_json}")
+    return None
+
+
+async def rescore_weights(job):
+    """
+    Recompute the overall score of every applicant of a job from their stored
+    sub-scores after the job's weights changed, without calling any model,
+    and write them back in a single request. Runs on the event loop: the
+    arithmetic is one vectorized pass and the request goes through the async
+    client, so there is nothing to hand to a thread.
+    """
+    job_id = job.data.get("jobId")
+    print(f"Re-weighting job {job_id} ({job.id})")
+    start = time.perf_counter()
+
+    try:
+        job_data = json.loads(job.data.get("jobData"))
+        applicants = job.data.get("applicants")
+        if isinstance(applicants, str):
+            applicants = json.loads(applicants)
+    except json.JSONDecodeError as e:
+        print(f"Error parsing JSON data for job {job.id}: {e}")
+        return None
+
+    applicant_ids = []
+    sub_scores = []
+    for applicant_data in applicants:
+        values = [applicant_data.get(field) for field in SCORE_WEIGHTS]
+        # applicants that were never scored keep having no overall score
+        if any(value is None for value in values):
+            continue
+        try:
+            sub_scores.append([float(value) for value in values])
+        except ValueError as e:
+            print(f"Invalid scores for applicant {applicant_data.get('id')}: {e}")
+            continue
+        applicant_ids.append(applicant_data.get("id"))
+
+    overall_scores = compute_overall_scores(
+        np.array(sub_scores, dtype=float).reshape(-1, len(SCORE_WEIGHTS)), job_data
+    )
+    scores = [
+        {"applicantId": applicant_id, "overallScoreAI": overall_score}
+        for applicant_id, overall_score in zip(applicant_ids, overall_scores)
+    ]
+    print(
+        f"Re-weighted {len(scores)}/{len(applicants)} applicants in "
+        f"{time.perf_counter() - start:.3f}s"
+    )
+    status_code, resp_json = await async_api_client.update_overall_scores_bulk(
+        job_id, scores
+    )
+    print(f"Updated overall scores: {status_code}, {resp_json}")
+    return None
+
+
 async def process(job, job_token):
     print(job.name)
-    if job.name == "process-resume":
-        await asyncio.to_thread(handle_extraction, job)
-        return "ok"
-    if job.name == "score-applicant":
-        await asyncio.to_thread(score_applicant, job)
+    job_type = JOB_TYPES.get(job.name)
+    if job_type is None:
+        return None
+    if job_type not in WORKER_ROLES:
+        # check_worker_roles() keeps this from happening with the configured
+        # queues, only a producer putting a job on the wrong queue gets here
+        raise Exception(f"{job.name} jobs are not handled by this worker")
+
+    if job.name == "process-resume" and resume_pipeline is not None:
+        # the pipeline stages have their own limits
+        tier = await handle_extraction_pipelined(job)
+        if tier:
+            await job.log(f"extraction tier: {tier}")
         return "ok"
+
+    async with job_type_limits[job_type]:
+        if job.name == "process-resume":
+            tier = await asyncio.to_thread(handle_extraction, job)
+            # keep track of which extraction tier each job needed
+            if tier:
+                await job.log(f"extraction tier: {tier}")
+            return "ok"
+        if job.name == "score-applicant":
+            await asyncio.to_thread(score_applicant, job)
+            return "ok"
+        if job.name == "score-job-batch":
+            await asyncio.to_thread(score_job_batch, job)
+            return "ok"
+        if job.name == "rescore-weights":
+            await rescore_weights(job)
+            return "ok"
     return None
 
 
 async def main():
+    check_worker_roles()
 
     # Create an event that will be triggered for shutdown
     shutdown_event = asyncio.Event()
@@ -211,19 +689,60 @@ async def main():
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
 
-    # Feel free to remove the connection parameter, if your redis runs on localhost
-    worker = Worker(
-        "cvrankify-jobs",
-        process,
-        {"connection": "redis://localhost:6379"},
-    )
+    # in process mode the extraction processes load their own models
+    if model_registry.PRELOAD_MODELS and extraction_pool.EXTRACTION_MODE != "process":
+        print("Preloading OCR / layout models...")
+        load_times = await asyncio.to_thread(model_registry.warm_up)
+        print(f"Model load times: {load_times}")
+
+    global resume_pipeline
+    if RESUME_PIPELINE and "extraction" in WORKER_ROLES:
+        resume_pipeline = make_resume_pipeline()
+        resume_pipeline.start(PIPELINE_STATS_INTERVAL)
+        print(f"Resume pipeline started, capacity {resume_pipeline.capacity}")
+
+    # One worker per queue, pulling as many jobs at once as the job types on
+    # that queue may run. On a shared queue the per type limits in process()
+    # still apply, but waiting jobs hold a worker slot, so separate queues are
+    # what keeps a burst of uploads from starving scoring.
+    queue_concurrency = {}
+    if "extraction" in WORKER_ROLES:
+        # with the pipeline, pull enough jobs to keep every stage busy
+        extraction_jobs = (
+            resume_pipeline.capacity
+            if resume_pipeline is not None
+            else EXTRACTION_CONCURRENCY
+        )
+        queue_concurrency[EXTRACTION_QUEUE_NAME] = (
+            queue_concurrency.get(EXTRACTION_QUEUE_NAME, 0) + extraction_jobs
+        )
+    if "scoring" in WORKER_ROLES:
+        queue_concurrency[SCORING_QUEUE_NAME] = (
+            queue_concurrency.get(SCORING_QUEUE_NAME, 0) + SCORING_CONCURRENCY
+        )
+
+    workers = []
+    for queue_name, concurrency in queue_concurrency.items():
+        print(f"Listening on {queue_name} with concurrency {concurrency}")
+        workers.append(
+            Worker(
+                queue_name,
+                process,
+                {"connection": REDIS_URL, "concurrency": concurrency},
+            )
+        )
 
     # Wait until the shutdown event is set
     await shutdown_event.wait()
 
-    # close the worker
-    print("Cleaning up worker...")
-    await worker.close()
+    # close the workers
+    print("Cleaning up workers...")
+    await asyncio.gather(*(worker.close() for worker in workers))
+    if resume_pipeline is not None:
+        print(f"Pipeline stats: {resume_pipeline.format_stats()}")
+        await resume_pipeline.close()
+    await asyncio.to_thread(extraction_pool.shutdown)
+    await async_api_client.close()
     print("Worker shut down successfully.")
 
 
@@ -0,0 +1,81 @@
+from dotenv import load_dotenv
+import os
+import threading
+import time
+import numpy as np
+
+load_dotenv()
+
+# Load the OCR / layout models when the worker starts instead of on the first job
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "false").lower() == "true"
+# Layout detection model used by unstructured's hi_res strategy
+HI_RES_MODEL_NAME = os.getenv("HI_RES_MODEL_NAME", "yolox")
+
+_models = {}
+_lock = threading.Lock()
+
+# Seconds spent constructing / warming each model, per worker process
+model_load_seconds = {}
+
+
+def _load(name: str, loader):
+    # Double-checked so concurrent jobs don't construct the same model twice
+    if name in _models:
+        return _models[name]
+    with _lock:
+        if name not in _models:
+            start = time.perf_counter()
+            _models[name] = loader()
+            model_load_seconds[name] = time.perf_counter() - start
+            print(f"Loaded model {name} in {model_load_seconds[name]:.2f}s")
+        return _models[name]
+
+
+def _load_ocr_predictor():
+    from doctr.models import ocr_predictor
+
+    return ocr_predictor(pretrained=True, assume_straight_pages=False)
+
+
+def _load_layout_model():
+    # unstructured_inference keeps loaded models in a module level dict keyed by
+    # name, so loading it here is what partition_pdf(hi_res_model_name=...) reuses
+    from unstructured_inference.models.base import get_model
+    from unstructured_inference.models import tables
+
+    model = get_model(HI_RES_MODEL_NAME)
+    # table structure model used by infer_table_structure=True
+    tables.load_agent()
+    return model
+
+
+def get_ocr_predictor():
+    """
+    Shared doctr predictor, loaded on first use.
+    """
+    return _load("doctr_ocr_predictor", _load_ocr_predictor)
+
+
+def get_layout_model():
+    """
+    Shared unstructured hi_res layout model, loaded on first use.
+    """
+    return _load(f"unstructured_{HI_RES_MODEL_NAME}", _load_layout_model)
+
+
+def warm_up():
+    """
+    Load every model and run one inference on a blank page so the first real
+    job doesn't pay for lazy initialisation inside the frameworks either.
+    """
+    from PIL import Image
+
+    start = time.perf_counter()
+    blank_page = np.full((256, 256, 3), 255, dtype=np.uint8)
+
+    get_ocr_predictor()([blank_page])
+    get_layout_model().predict(Image.fromarray(blank_page))
+
+    model_load_seconds["warm_up"] = time.perf_counter() - start
+    print(f"Models warmed up in {model_load_seconds['warm_up']:.2f}s")
+    return dict(model_load_seconds)
@@ -0,0 +1,167 @@
+from dotenv import load_dotenv
+from cache import normalize_key_part
+import argparse
+import csv
+import json
+import math
+import os
+import threading
+
+load_dotenv()
+
+PAIR_TABLE_DIR = os.getenv("PAIR_TABLE_DIR", "data/pair_tables")
+
+
+def parse_score(text: str) -> float:
+    """
+    A 0-100 score cell. Raises ValueError for anything else.
+    """
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError:
+        raise ValueError(f"{text!r} is not a number")
+    # bool is an int subclass, true would silently become 1.0
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{text!r} is not a number")
+    if math.isnan(value) or not 0 <= value <= 100:
+        raise ValueError(f"{text!r} is not between 0 and 100")
+    return float(value)
+
+
+def parse_relevant(text: str) -> bool:
+    """
+    A true/false cell, also accepting the yes/no and True/False people write
+    by hand. Raises ValueError for anything else.
+    """
+    value = text.strip().lower()
+    if value in ("true", "yes"):
+        return True
+    if value in ("false", "no"):
+        return False
+    raise ValueError(f"{text!r} is not true or false")
+
+
+class PairTable:
+    """
+    Persistent lookup table from a (left, right) string pair to a model answer.
+    Keys are case and whitespace normalized. The table lives in an append-only
+    CSV file (last row for a pair wins) so it can be seeded and reviewed by hand.
+    parse turns a value cell into the value and raises ValueError for cells
+    that aren't valid for the table; those rows are skipped.
+    """
+
+    def __init__(self, name: str, columns: tuple[str, str, str], parse):
+        self.name = name
+        self.columns = columns
+        self.parse = parse
+        self.path = os.path.join(PAIR_TABLE_DIR, f"{name}.csv")
+        self._values = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            self._values.update(self._read_csv(self.path))
+
+    def _read_csv(self, path: str) -> dict:
+        values = {}
+        left_column, right_column, value_column = self.columns
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                key = (
+                    normalize_key_part(row[left_column]),
+                    normalize_key_part(row[right_column]),
+                )
+                try:
+                    values[key] = self.parse(row[value_column] or "")
+                except ValueError as e:
+                    print(f"Skipping {self.name} row {key} in {path}: {e}")
+        return values
+
+    def _append_rows(self, rows: list[tuple]):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        is_new = not os.path.exists(self.path)
+        with open(self.path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(self.columns)
+            for left, right, value in rows:
+                writer.writerow([left, right, json.dumps(value)])
+
+    def get(self, left: str, right: str):
+        key = (normalize_key_part(left), normalize_key_part(right))
+        return self._values.get(key)
+
+    def set(self, left: str, right: str, value):
+        """
+        Store a value for a pair. Raises ValueError for values parse rejects,
+        so nothing is written that the next read would skip.
+        """
+        value = self.parse(json.dumps(value))
+        key = (normalize_key_part(left), normalize_key_part(right))
+        with self._lock:
+            if self._values.get(key) == value:
+                return
+            self._values[key] = value
+            self._append_rows([(*key, value)])
+
+    def seed(self, path: str) -> int:
+        """
+        Merge rows from a CSV with the same columns into the table.
+        Returns the number of pairs added or changed.
+        """
+        with self._lock:
+            rows = [
+                (*key, value)
+                for key, value in self._read_csv(path).items()
+                if self._values.get(key) != value
+            ]
+            for left, right, value in rows:
+                self._values[(left, right)] = value
+            if rows:
+                self._append_rows(rows)
+        return len(rows)
+
+    def export(self, path: str) -> int:
+        """
+        Write the current table, one row per pair, sorted for review.
+        """
+        with self._lock:
+            items = sorted(self._values.items())
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            for (left, right), value in items:
+                writer.writerow([left, right, json.dumps(value)])
+        return len(items)
+
+
+# Score 0-100 of how close the applicant's education field is to the job's
+education_field_table = PairTable(
+    "edu_match", ("job_field", "applicant_field", "score"), parse_score
+)
+
+# Whether an experience with the given title counts towards the job's required years
+experience_relevance_table = PairTable(
+    "exp_relevance", ("job_title", "experience_title", "relevant"), parse_relevant
+)
+
+pair_tables = {
+    "edu_match": education_field_table,
+    "exp_relevance": experience_relevance_table,
+}
+
+
+if __name__ == "__main__":
+    # python pair_table.py seed edu_match seed.csv
+    # python pair_table.py export edu_match review.csv
+    parser = argparse.ArgumentParser(description="Seed or export a pair table")
+    parser.add_argument("action", choices=["seed", "export"])
+    parser.add_argument("table", choices=sorted(pair_tables))
+    parser.add_argument("csv_path")
+    args = parser.parse_args()
+
+    table = pair_tables[args.table]
+    if args.action == "seed":
+        count = table.seed(args.csv_path)
+        print(f"Seeded {count} pairs into {table.path}")
+    else:
+        count = table.export(args.csv_path)
+        print(f"Exported {count} pairs to {args.csv_path}")
@@ -0,0 +1,175 @@
+import asyncio
+import time
+
+
+class Stage:
+    """
+    One step of a Pipeline: handler runs in a thread on up to concurrency
+    items at once, fed from a queue of at most queue_size waiting items.
+    cleanup, if given, releases an item the pipeline drops before handler
+    took it over (like an open file left in the queue on close).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler,
+        concurrency: int = 1,
+        queue_size: int = 1,
+        cleanup=None,
+    ):
+        self.name = name
+        self.handler = handler
+        self.cleanup = cleanup
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue = None
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def discard(self, item):
+        if self.cleanup is None:
+            return
+        try:
+            self.cleanup(item)
+        except Exception as e:
+            print(f"Error cleaning up dropped {self.name} item: {e}")
+
+    def stats(self, elapsed: float) -> dict:
+        return {
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "per_minute": round(self.processed / elapsed * 60, 2) if elapsed else 0.0,
+            # share of the stage's worker time spent running the handler,
+            # the bottleneck is the stage that stays close to 1
+            "utilization": (
+                round(self.busy_seconds / (elapsed * self.concurrency), 2)
+                if elapsed
+                else 0.0
+            ),
+        }
+
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded queues, so consecutive items overlap:
+    while one item is in the second stage the next one is already in the first.
+    submit() waits for room in the first queue and returns the result of the
+    last stage; an exception in any stage is raised from submit() and the item
+    skips the remaining stages.
+    """
+
+    def __init__(self, stages: list[Stage]):
+        self.stages = stages
+        self._tasks = []
+        self._started_at = None
+        self._closed = False
+
+    @property
+    def capacity(self) -> int:
+        # items the pipeline can hold at once, running or queued
+        return sum(stage.concurrency + stage.queue_size for stage in self.stages)
+
+    def start(self, stats_interval: float = 0):
+        self._started_at = time.monotonic()
+        for index, stage in enumerate(self.stages):
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+            next_stage = (
+                self.stages[index + 1] if index + 1 < len(self.stages) else None
+            )
+            for _ in range(stage.concurrency):
+                self._tasks.append(asyncio.create_task(self._run(stage, next_stage)))
+        if stats_interval > 0:
+            self._tasks.append(asyncio.create_task(self._report(stats_interval)))
+
+    async def submit(self, item):
+        if self._closed:
+            raise RuntimeError("pipeline is closed")
+        future = asyncio.get_running_loop().create_future()
+        await self.stages[0].queue.put((item, future))
+        return await future
+
+    async def _run(self, stage: Stage, next_stage: Stage | None):
+        while True:
+            item, future = await stage.queue.get()
+            stage.in_flight += 1
+            start = time.perf_counter()
+            handler = asyncio.ensure_future(asyncio.to_thread(stage.handler, item))
+            try:
+                result = await asyncio.shield(handler)
+            except asyncio.CancelledError:
+                # closed mid-handler: the thread can't be stopped, so whatever
+                # it returns is dropped once it finishes
+                if next_stage is not None:
+                    handler.add_done_callback(
+                        lambda done: self._discard_result(done, next_stage)
+                    )
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                stage.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            finally:
+                stage.in_flight -= 1
+                stage.busy_seconds += time.perf_counter() - start
+            stage.processed += 1
+            if next_stage is None:
+                if not future.done():
+                    future.set_result(result)
+                continue
+            try:
+                # waits while the next stage is full, which is what keeps a
+                # fast stage from piling up work in front of a slow one
+                await next_stage.queue.put((result, future))
+            except asyncio.CancelledError:
+                next_stage.discard(result)
+                if not future.done():
+                    future.cancel()
+                raise
+
+    @staticmethod
+    def _discard_result(handler: asyncio.Future, next_stage: Stage):
+        if not handler.cancelled() and handler.exception() is None:
+            next_stage.discard(handler.result())
+
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {stage.name: stage.stats(elapsed) for stage in self.stages}
+
+    def format_stats(self) -> str:
+        return ", ".join(
+            f"{name}: {s['queued']} queued, {s['in_flight']} running, "
+            f"{s['per_minute']}/min, {s['utilization']:.0%} busy"
+            for name, s in self.stats().items()
+        )
+
+    async def _report(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            print(f"Pipeline stats: {self.format_stats()}")
+
+    async def close(self):
+        self._closed = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # fail whatever was still queued so nobody waits on it forever, again
+        # after yielding, since every item taken lets a submit() waiting for
+        # room put in its own
+        queues = [stage.queue for stage in self.stages if stage.queue is not None]
+        while any(not queue.empty() for queue in queues):
+            for stage in self.stages:
+                while stage.queue is not None and not stage.queue.empty():
+                    item, future = stage.queue.get_nowait()
+                    stage.discard(item)
+                    if not future.done():
+                        future.cancel()
+            await asyncio.sleep(0)
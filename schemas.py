@@ -0,0 +1,91 @@
+from typing import Annotated, Literal
+from pydantic import BaseModel, Field, RootModel
+
+# Response models of the finetuned models. Their JSON schema is sent as
+# Ollama's format= so generation is constrained to it, and the output is
+# validated back into them.
+
+
+class EduTimezone(BaseModel):
+    """
+    edu-timezone-extractor
+    """
+
+    highestEducationDegree: Literal[
+        "High School", "Bachelor", "Master", "PhD", "Unknown"
+    ] = "Unknown"
+    educationField: str = "Unknown"
+    timezone: str = "Unknown"
+
+
+class Skills(BaseModel):
+    """
+    skills-extractor
+    """
+
+    skills: list[str] = []
+
+
+class ExperiencePeriod(BaseModel):
+    startYear: str
+    startMonth: str = "None"
+    endYear: str
+    endMonth: str = "None"
+    jobTitle: str
+
+
+class ExperiencePeriods(BaseModel):
+    """
+    experience-extractor
+    """
+
+    experiencePeriods: list[ExperiencePeriod] = []
+
+
+class SkillMatch(BaseModel):
+    skill: str
+    match_type: Literal["explicit", "implied", "missing"]
+    from_cv: str | None = None
+    score: float
+    reason: str = ""
+
+
+class SkillsMatch(BaseModel):
+    """
+    skills_score
+    """
+
+    job_skills: list[SkillMatch]
+
+
+class ApplicantSkillsMatch(BaseModel):
+    id: str
+    job_skills: list[SkillMatch]
+
+
+class SkillsMatchBatch(BaseModel):
+    """
+    skills_score_batch, one skills_score answer per applicant
+    """
+
+    applicants: list[ApplicantSkillsMatch]
+
+
+class ExperienceRelevanceEntry(BaseModel):
+    jobTitle: str
+    relevant: bool
+
+
+class ExperienceRelevance(BaseModel):
+    """
+    exp_relevance_eval, the model echoes the experience periods it was given
+    with a relevant flag added; only the fields used are validated.
+    """
+
+    experiencePeriods: list[ExperienceRelevanceEntry]
+
+
+class EducationFieldScore(RootModel[Annotated[float, Field(ge=0, le=100)]]):
+    """
+    edu-match, a bare 0-100 number
+    """
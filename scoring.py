@@ -1,8 +1,126 @@
-from ollama import Client
 import json
-from datetime import datetime
-
-client = Client()
+import re
+import numpy as np
+import llm
+from cache import make_result_cache, normalize_key_part, hash_key
+from skill_index import (
+    skill_index,
+    SKILL_EMBEDDING_MODEL,
+    SKILL_EMBEDDING_MATCH,
+    SKILL_EMBEDDING_MISS,
+)
+from experience_engine import relevant_bounds, score_experience
+from pair_table import education_field_table, experience_relevance_table
+from schemas import (
+    SkillsMatch,
+    SkillsMatchBatch,
+    ExperienceRelevance,
+    EducationFieldScore,
+)
+
+# skills_score runs at temperature 0, so the same skill sets always give the same answer
+skills_score_cache = make_result_cache("skills_score")
+
+# Other names for the same skill, after normalize_skill. Matched locally as
+# explicit matches instead of asking skills_score.
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "es6": "javascript",
+    "ts": "typescript",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "reactjs": "react",
+    "react js": "react",
+    "nodejs": "node",
+    "node js": "node",
+    "nextjs": "next",
+    "next js": "next",
+    "vuejs": "vue",
+    "vue js": "vue",
+    "angularjs": "angular",
+    "expressjs": "express",
+    "dotnet": ".net",
+    "net": ".net",
+    "csharp": "c#",
+    "cpp": "c++",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "gcp": "google cloud",
+    "google cloud platform": "google cloud",
+    "aws": "amazon web services",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "nlp": "natural language processing",
+    "ci cd": "ci/cd",
+    "html5": "html",
+    "css3": "css",
+    "tailwindcss": "tailwind",
+    "tailwind css": "tailwind",
+    "ms excel": "excel",
+    "microsoft excel": "excel",
+    "powerbi": "power bi",
+    "scikit learn": "scikit-learn",
+    "sklearn": "scikit-learn",
+}
+# Trailing words that don't change which skill is meant ("MySQL Database",
+# "C++ Programming Language"), only dropped when what's left is one of
+# QUALIFIED_SKILLS, so "Java Scripting Language" stays apart from "Java"
+SKILL_QUALIFIERS = ["programming language", "language", "database"]
+QUALIFIED_SKILLS = {
+    "python",
+    "java",
+    "javascript",
+    "typescript",
+    "c",
+    "c++",
+    "c#",
+    "go",
+    "rust",
+    "ruby",
+    "php",
+    "perl",
+    "r",
+    "kotlin",
+    "swift",
+    "scala",
+    "dart",
+    "sql",
+    "mysql",
+    "postgresql",
+    "mariadb",
+    "sqlite",
+    "oracle",
+    "mongodb",
+    "redis",
+}
+# Two skill names are the same skill misspelt when they differ in a single
+# word, by at most this many edits, keeping that word's first and last letter
+# ("Kubernets"). String similarity alone can't tell a typo from a different
+# product ("SQL Server" / "MySQL Server", "React" / "Preact").
+SKILL_TYPO_MAX_EDITS = 2
+# Shorter words only allow one edit, and words under SKILL_TYPO_MIN_LENGTH
+# none, since one letter there is often a different skill ("C" / "R")
+SKILL_TYPO_SHORT_LENGTH = 8
+SKILL_TYPO_MIN_LENGTH = 5
+# Bump when the local matching logic changes. Cached skills scores are
+# partly decided by it, so the key includes this and the matcher config
+# (aliases, qualifiers, typo limits, embedding tier), and changing any of
+# them stops old answers from being served.
+SKILL_MATCHER_VERSION = "3"
+SKILL_MATCHER_KEY = hash_key(
+    SKILL_MATCHER_VERSION,
+    sorted(SKILL_ALIASES.items()),
+    SKILL_QUALIFIERS,
+    sorted(QUALIFIED_SKILLS),
+    [SKILL_TYPO_MAX_EDITS, SKILL_TYPO_SHORT_LENGTH, SKILL_TYPO_MIN_LENGTH],
+    (
+        [SKILL_EMBEDDING_MODEL, SKILL_EMBEDDING_MATCH, SKILL_EMBEDDING_MISS]
+        if skill_index is not None
+        else None
+    ),
+)[:16]
 
 
 def score_education_match(
@@ -35,24 +153,27 @@ def score_education_match(
             applicant_highest_degree_value / job_required_degree_value
         ) * 100
 
-    response = client.chat(
-        model=model,
-        messages=[
-            {
-                "role": "user",
-                "content": f"{job_education_field}, {applicant_education_field}",
-            },
-        ],
-        think=False,
+    # The same few field pairs come up for most applicants, only ask the model
+    # for pairs it hasn't scored before
+    field_score = education_field_table.get(
+        job_education_field, applicant_education_field
     )
+    if field_score is None:
+        parsed, response = llm.chat_structured(
+            model,
+            f"{job_education_field}, {applicant_education_field}",
+            EducationFieldScore,
+        )
 
-    field_score_response = response["message"]["content"].strip()
-
-    try:
-        field_score = float(field_score_response)
-    except ValueError:
-        print(f"Error converting field score to float: {field_score_response}")
-        field_score = 0
+        if parsed is not None:
+            field_score = parsed.root
+            education_field_table.set(
+                job_education_field, applicant_education_field, field_score
+            )
+        else:
+            field_score_response = response["message"]["content"].strip()
+            print(f"Error converting field score to float: {field_score_response}")
+            field_score = 0
 
     overall_score = (degree_score * 0.6) + (field_score * 0.4)
 
@@ -65,69 +186,89 @@ def score_education_match(
 # print(f"Education Match Score: {score}")
 
 
-def score_skills_match(job_skills: list[str], applicant_skills: list[str]):
-    model = "skills_score"
-    score = 0
-
+def request_skills_match(
+    model: str, job_skills: list[str], applicant_skills: list[str]
+) -> dict | None:
+    """
+    Ask the skills model to match job skills against CV skills.
+    Returns None if no valid answer could be obtained.
+    """
     data = {
         "job_skills": job_skills,
         "cv_skills": applicant_skills,
     }
 
-    response = client.chat(
-        model=model,
-        messages=[
-            {
-                "role": "user",
-                "content": json.dumps(
-                    data,
-                    indent=2,
-                ),
-            },
-        ],
-        think=False,
-    )
-
     # Proper pretty-printed JSON output
     print("DATA SENT:")
     print(json.dumps(data, indent=2))
 
-    skills_match_response = response["message"]["content"].strip()
+    parsed, response = llm.chat_structured(
+        model, json.dumps(data, indent=2), SkillsMatch
+    )
+
+    print(f"Skills Match Response: {response['message']['content'].strip()}")
+    if parsed is None:
+        return None
+    return parsed.model_dump()
+
+
+def skills_cache_key(model: str, job_skills: list[str], applicant_skills: list[str]):
+    def normalize(skills):
+        return sorted({normalize_key_part(skill) for skill in skills if skill.strip()})
+
+    return hash_key(
+        model, SKILL_MATCHER_KEY, normalize(job_skills), normalize(applicant_skills)
+    )
 
-    print(f"Skills Match Response: {skills_match_response}")
-    try:
-        skills_match_json = json.loads(skills_match_response)
-        total_score = 0
-        for skill_entry in skills_match_json["job_skills"]:
-            total_score += skill_entry.get("score", 0)
-        score = total_score / len(job_skills) if job_skills else 0
-    except json.JSONDecodeError as e:
-        print(f"JSON decode error: {e}")
-        print("Passing to json fixer model...")
-        # Try to fix JSON using json_fixer model
-        fixer_response = client.chat(
-            model="json_fixer",
-            messages=[
-                {
-                    "role": "user",
-                    "content": skills_match_response,
-                },
-            ],
-            think=False,
-        )
-        fixed_json_str = fixer_response["message"]["content"].strip()
-        print(f"Fixed JSON Response: {fixed_json_str}")
-        try:
-            skills_match_json = json.loads(fixed_json_str)
-            total_score = 0
-            for skill_entry in skills_match_json["job_skills"]:
-                total_score += skill_entry.get("score", 0)
-            score = total_score / len(job_skills) if job_skills else 0
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error after fixing: {e}")
-            print("Unable to parse skills match JSON.")
-            score = 0
-            skills_match_json = {"job_skills": []}
+
+def request_skills_match_batch(
+    model: str, job_skills: list[str], applicants_skills: list[list[str]]
+) -> list[dict | None]:
+    """
+    Ask the batch skills model to match the job skills against several
+    applicants' CV skills in one generation. Returns one skills_score style
+    answer per applicant, in order, with None for applicants whose part of the
+    answer is missing or doesn't cover exactly the job skills.
+    """
+    data = {
+        "job_skills": job_skills,
+        "applicants": [
+            {"id": str(index), "cv_skills": skills}
+            for index, skills in enumerate(applicants_skills, start=1)
+        ],
+    }
+
+    parsed, response = llm.chat_structured(
+        model, json.dumps(data, indent=2), SkillsMatchBatch
+    )
+    if parsed is None:
+        print(f"Skills Match Batch Response: {response['message']['content']}")
+        return [None] * len(applicants_skills)
+
+    answers = {applicant.id: applicant for applicant in parsed.applicants}
+    expected = sorted(normalize_key_part(skill) for skill in job_skills)
+    results = []
+    for index in range(1, len(applicants_skills) + 1):
+        answer = answers.get(str(index))
+        if answer is None or expected != sorted(
+            normalize_key_part(entry.skill) for entry in answer.job_skills
+        ):
+            print(f"Skills match batch answer for applicant {index} is unusable")
+            results.append(None)
+        else:
+            results.append({"job_skills": [e.model_dump() for e in answer.job_skills]})
+    return results
+
+
+def skills_match_result(job_skills: list[str], skills_match_json: dict):
+    """
+    (score 0-100, match records) from a skills_score answer, with the fields
+    renamed to what the web app stores.
+    """
+    total_score = 0
+    for skill_entry in skills_match_json["job_skills"]:
+        total_score += skill_entry.get("score", 0)
+    score = total_score / len(job_skills) if job_skills else 0
 
     # Replace match_type with matchType, skill with jobSkill, from_cv with applicantSkill
     skills_match_json = {
@@ -148,6 +289,311 @@ def score_skills_match(job_skills: list[str], applicant_skills: list[str]):
     return (score * 100, skills_match_json)
 
 
+def normalize_skill(skill: str) -> str:
+    skill = skill.lower()
+    # qualifiers like "Photoshop (any version)"
+    skill = re.sub(r"\(.*?\)", " ", skill)
+    # "Node.js" -> "nodejs", ".NET" -> ".net"
+    skill = re.sub(r"(?<=\w)\.(?=\w)", "", skill)
+    skill = re.sub(r"[^a-z0-9+#./]+", " ", skill)
+    words = [w.strip("./") for w in skill.split() if w.strip("./")]
+    if skill.strip().startswith(".") and words:
+        words[0] = "." + words[0]
+    return " ".join(words)
+
+
+def canonical_skill(skill: str) -> str:
+    normalized = normalize_skill(skill)
+    normalized = SKILL_ALIASES.get(normalized, normalized)
+    for qualifier in SKILL_QUALIFIERS:
+        if normalized.endswith(" " + qualifier):
+            rest = normalized[: -len(qualifier) - 1]
+            rest = SKILL_ALIASES.get(rest, rest)
+            if rest in QUALIFIED_SKILLS:
+                return rest
+    return normalized
+
+
+def _local_match(job_skill: str, cv_skill: str, reason: str) -> dict:
+    return {
+        "skill": job_skill,
+        "match_type": "explicit",
+        "from_cv": cv_skill,
+        "score": 1.0,
+        "reason": reason,
+    }
+
+
+def edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+def is_skill_typo(a: str, b: str) -> bool:
+    """
+    Whether two canonical skill names are the same skill with a typo in one
+    word, see SKILL_TYPO_MAX_EDITS.
+    """
+    words_a, words_b = a.split(), b.split()
+    if len(words_a) != len(words_b):
+        return False
+    differing = [(x, y) for x, y in zip(words_a, words_b) if x != y]
+    if len(differing) != 1:
+        return False
+    x, y = differing[0]
+    length = min(len(x), len(y))
+    if length < SKILL_TYPO_MIN_LENGTH or x[0] != y[0] or x[-1] != y[-1]:
+        return False
+    max_edits = SKILL_TYPO_MAX_EDITS if length >= SKILL_TYPO_SHORT_LENGTH else 1
+    return abs(len(x) - len(y)) <= max_edits and edit_distance(x, y) <= max_edits
+
+
+def match_skills_locally(
+    job_skills: list[str], applicant_skills: list[str]
+) -> tuple[dict, list[str]]:
+    """
+    Find the explicit matches without the model: the same skill after
+    normalization, a known alias, or a one word typo of it.
+    Returns ({normalized job skill: skills_score style entry}, job skills
+    left for the model to judge as implied or missing).
+    """
+    index = {}
+    for cv_skill in applicant_skills:
+        if cv_skill.strip():
+            index.setdefault(canonical_skill(cv_skill), cv_skill)
+
+    matches = {}
+    unresolved = []
+    for job_skill in job_skills:
+        key = normalize_key_part(job_skill)
+        if key in matches:
+            continue
+        canonical = canonical_skill(job_skill)
+        cv_skill = index.get(canonical)
+        if cv_skill is not None:
+            if normalize_skill(cv_skill) == normalize_skill(job_skill):
+                reason = "Exact match between job skill and CV skill"
+            else:
+                reason = f"{cv_skill} is another name for {job_skill}"
+            matches[key] = _local_match(job_skill, cv_skill, reason)
+            continue
+
+        cv_skill = next(
+            (
+                cv_skill
+                for candidate, cv_skill in index.items()
+                if is_skill_typo(canonical, candidate)
+            ),
+            None,
+        )
+        if cv_skill is not None:
+            matches[key] = _local_match(
+                job_skill, cv_skill, f"{cv_skill} is a spelling of {job_skill}"
+            )
+            continue
+        unresolved.append(job_skill)
+    return matches, unresolved
+
+
+def match_skills_by_embedding(
+    job_skills: list[str], applicant_skills: list[str]
+) -> tuple[dict, list[str]]:
+    """
+    Decide the job skills whose closest CV skill is clearly similar (implied
+    match) or clearly unrelated (missing) by the cosine similarity of their
+    embeddings. Returns the same as match_skills_locally; the job skills in
+    the ambiguous band are left for the model.
+    """
+    cv_skills = [skill for skill in applicant_skills if skill.strip()]
+    if skill_index is None or not job_skills or not cv_skills:
+        return {}, job_skills
+    try:
+        similarity = skill_index.similarity(job_skills, cv_skills)
+    except Exception as e:
+        # the model may not be pulled, skills_score can still judge them all
+        print(f"Skill embedding error: {e}")
+        return {}, job_skills
+
+    closest = similarity.argmax(axis=1)
+    best = similarity[np.arange(len(job_skills)), closest]
+    matches = {}
+    unresolved = []
+    for job_skill, cv_index, value in zip(job_skills, closest, best):
+        cv_skill = cv_skills[cv_index]
+        if value >= SKILL_EMBEDDING_MATCH:
+            entry = {
+                "skill": job_skill,
+                "match_type": "implied",
+                "from_cv": cv_skill,
+                "score": 0.5,
+                "reason": f"{cv_skill} is closely related to {job_skill} "
+                f"(similarity {value:.2f})",
+            }
+        elif value < SKILL_EMBEDDING_MISS:
+            entry = {
+                "skill": job_skill,
+                "match_type": "missing",
+                "from_cv": None,
+                "score": 0.0,
+                "reason": f"No CV skill is related to {job_skill} "
+                f"(closest {cv_skill}, similarity {value:.2f})",
+            }
+        else:
+            unresolved.append(job_skill)
+            continue
+        matches.setdefault(normalize_key_part(job_skill), entry)
+    return matches, unresolved
+
+
+def resolve_skills(
+    job_skills: list[str], applicant_skills: list[str]
+) -> tuple[dict, list[str]]:
+    """
+    Every job skill decided without skills_score (local matching, then the
+    embeddings when enabled) and the ones left for it.
+    """
+    matches, unresolved = match_skills_locally(job_skills, applicant_skills)
+    if unresolved and skill_index is not None:
+        embedded, unresolved = match_skills_by_embedding(unresolved, applicant_skills)
+        matches.update(embedded)
+    return matches, unresolved
+
+
+def merge_skill_matches(
+    job_skills: list[str], local_matches: dict, skills_match_json: dict
+) -> dict:
+    """
+    The full skills_score answer from the local matches and the model's
+    answer for the remaining job skills, in job skill order.
+    """
+    answered = {}
+    for entry in skills_match_json["job_skills"]:
+        answered.setdefault(normalize_key_part(entry["skill"]), entry)
+
+    entries = []
+    for job_skill in dict.fromkeys(job_skills):
+        key = normalize_key_part(job_skill)
+        entry = local_matches.get(key) or answered.pop(key, None)
+        if entry is not None:
+            entries.append(entry)
+    # keep answers for skills the model renamed, as before
+    entries.extend(entry for key, entry in answered.items() if key not in local_matches)
+    return {"job_skills": entries}
+
+
+def score_skills_match(job_skills: list[str], applicant_skills: list[str]):
+    model = "skills_score"
+
+    cache_key = skills_cache_key(model, job_skills, applicant_skills)
+    cached = skills_score_cache.get(cache_key)
+    if cached is not None:
+        print(f"Skills score cache hit: {cache_key}")
+        skills_match_json = json.loads(cached)
+    else:
+        # clear cases are decided locally, the model only judges the rest
+        local_matches, unresolved = resolve_skills(job_skills, applicant_skills)
+        print(
+            f"Resolved {len(local_matches)}/{len(job_skills)} job skills locally, "
+            f"{len(unresolved)} left for {model}"
+        )
+        answer = {"job_skills": []}
+        if unresolved:
+            answer = request_skills_match(model, unresolved, applicant_skills)
+        if answer is not None:
+            skills_match_json = merge_skill_matches(job_skills, local_matches, answer)
+            skills_score_cache.set(cache_key, json.dumps(skills_match_json).encode())
+        else:
+            print("Unable to parse skills match JSON.")
+            skills_match_json = {"job_skills": list(local_matches.values())}
+
+    return skills_match_result(job_skills, skills_match_json)
+
+
+def score_skills_match_batch(
+    job_skills: list[str], applicants_skills: list[list[str]]
+) -> list[tuple]:
+    """
+    score_skills_match for several applicants of the same job. Clear cases
+    are decided locally, and the job skills still open for any of the
+    uncached applicants are judged in a single skills_score_batch call so the
+    system prompt is only evaluated once. Applicants the batch answer doesn't
+    cover properly go through score_skills_match.
+    """
+    if skill_index is not None:
+        # embed every skill of the batch in one request up front
+        try:
+            skill_index.vectors(
+                list(job_skills)
+                + [skill for skills in applicants_skills for skill in skills]
+            )
+        except Exception as e:
+            print(f"Skill embedding error: {e}")
+    results = [None] * len(applicants_skills)
+    pending = {}
+    for index, applicant_skills in enumerate(applicants_skills):
+        # same answer as skills_score, so both share the cache entries
+        cache_key = skills_cache_key("skills_score", job_skills, applicant_skills)
+        cached = skills_score_cache.get(cache_key)
+        if cached is not None:
+            results[index] = skills_match_result(job_skills, json.loads(cached))
+            continue
+        local_matches, unresolved = resolve_skills(job_skills, applicant_skills)
+        if not unresolved:
+            skills_match_json = merge_skill_matches(
+                job_skills, local_matches, {"job_skills": []}
+            )
+            skills_score_cache.set(cache_key, json.dumps(skills_match_json).encode())
+            results[index] = skills_match_result(job_skills, skills_match_json)
+        else:
+            pending[index] = (cache_key, local_matches, unresolved)
+
+    if len(pending) > 1:
+        # one job skill list for the whole batch: every skill some applicant
+        # still needs judged
+        open_skills = {
+            normalize_key_part(skill)
+            for _, _, unresolved in pending.values()
+            for skill in unresolved
+        }
+        batch_skills = [
+            skill
+            for skill in dict.fromkeys(job_skills)
+            if normalize_key_part(skill) in open_skills
+        ]
+        answers = request_skills_match_batch(
+            "skills_score_batch",
+            batch_skills,
+            [applicants_skills[index] for index in pending],
+        )
+        for (index, (cache_key, local_matches, _)), answer in zip(
+            pending.items(), answers
+        ):
+            if answer is not None:
+                skills_match_json = merge_skill_matches(
+                    job_skills, local_matches, answer
+                )
+                skills_score_cache.set(
+                    cache_key, json.dumps(skills_match_json).encode()
+                )
+                results[index] = skills_match_result(job_skills, skills_match_json)
+
+    for index in pending:
+        if results[index] is None:
+            results[index] = score_skills_match(job_skills, applicants_skills[index])
+    return results
+
+
 # (score, skills_match_json) = score_skills_match(
 #     job_skills=["html", "css", "javascript", "typescript", "react", "webpack"],
 #     applicant_skills=[
@@ -177,114 +623,103 @@ def score_skills_match(job_skills: list[str], applicant_skills: list[str]):
 #   ]
 
 
-def score_experience_years(
-    experience_periods: list[dict], job_relevant_experience_years: int, job_title: str
-):
+def judge_experience_relevance(
+    job_title: str, experience_periods: list[dict]
+) -> dict[str, bool]:
+    """
+    Decide which experience titles are relevant to the job title. Known pairs
+    come from the relevance table, only the unseen titles are sent to the
+    model (once each) and their answers stored for the next applicant.
+    Returns {normalized experience title: relevant}.
+    """
     model = "exp_relevance_eval"
-    score = 0
-    relevant_experience = []
+    relevance = {}
+    uncached = {}
 
-    # First get the relevant experience periods based on job title
+    for exp in experience_periods:
+        title = normalize_key_part(exp.get("jobTitle"))
+        if title in relevance or title in uncached:
+            continue
+        cached = experience_relevance_table.get(job_title, title)
+        if cached is None:
+            uncached[title] = exp
+        else:
+            relevance[title] = cached
+
+    if not uncached:
+        return relevance
 
     data = {
-        "experiencePeriods": experience_periods,
+        "experiencePeriods": [
+            {
+                key: exp.get(key)
+                for key in (
+                    "startYear",
+                    "startMonth",
+                    "endYear",
+                    "endMonth",
+                    "jobTitle",
+                )
+            }
+            for exp in uncached.values()
+        ],
         "jobTitle": job_title,
     }
 
     print(f"{json.dumps(data, indent=2)}")
 
-    response = client.chat(
-        model=model,
-        messages=[
-            {
-                "role": "user",
-                "content": json.dumps(data, indent=2),
-            },
-        ],
-        think=False,
+    parsed, response = llm.chat_structured(
+        model, json.dumps(data, indent=2), ExperienceRelevance
     )
 
     relevant_experience_response = response["message"]["content"].strip()
     print(f"Relevant Experience Response: {relevant_experience_response}")
-    # parse json
-    try:
-        relevant_experience_json = json.loads(relevant_experience_response)
-        relevant_experience = relevant_experience_json.get("experiencePeriods", [])
-    except json.JSONDecodeError as e:
-        print(f"JSON decode error: {e}")
-        relevant_experience = []
-
-    month_map = {
-        "January": 1,
-        "February": 2,
-        "March": 3,
-        "April": 4,
-        "May": 5,
-        "June": 6,
-        "July": 7,
-        "August": 8,
-        "September": 9,
-        "October": 10,
-        "November": 11,
-        "December": 12,
-        "None": 1,
-        None: 1,
-    }
-
-    current_year = datetime.now().year
-    current_month = datetime.now().month
-    # Step 1: Filter only relevant experiences and normalize dates
-    # [{'id': 2, 'createdAt': '2025-10-10T13:44:04.582Z', 'updatedAt': '2025-10-10T13:47:20.892Z', 'jobTitle': 'Graphic Artist', 'startYear': '2011', 'endYear': 'Present', 'startMonth': 'April', 'endMonth': 'None', 'relevant': True, 'applicantId': 20}]
-    ranges = []
-    for exp in relevant_experience:
-        if not exp.get("relevant", False):
-            continue
-
-        start_year = int(exp["startYear"])
-        start_month = month_map.get(exp["startMonth"], 1)
-
-        if exp["endYear"] == "Present":
-            end_year = current_year
-            end_month = current_month
-        else:
-            end_year = int(exp["endYear"])
-            end_month = month_map.get(exp["endMonth"], 1)
-
-        start_index = start_year * 12 + start_month
-        end_index = end_year * 12 + end_month
+    judged = parsed.experiencePeriods if parsed is not None else []
 
-        ranges.append((start_index, end_index))
-    print("RANGESSSSSS", ranges)
-    if not ranges:
-        return (relevant_experience, 0.0, 0.0)
+    uncached_titles = list(uncached)
+    for index, exp in enumerate(judged):
+        title = normalize_key_part(exp.jobTitle)
+        # fall back to position when the model rewrote the title
+        if title not in uncached and index < len(uncached_titles):
+            title = uncached_titles[index]
+        if title in uncached and title not in relevance:
+            relevance[title] = exp.relevant
+            experience_relevance_table.set(job_title, title, relevance[title])
 
-    ranges.sort()
-    merged = [ranges[0]]
+    return relevance
 
-    for start, end in ranges[1:]:
-        last_start, last_end = merged[-1]
-        if start <= last_end:  # overlap or continuous
-            merged[-1] = (last_start, max(last_end, end))
-        else:
-            merged.append((start, end))
 
-    # Step 3: Compute total months
-    print("MERGEDDDD", merged)
-    print("MERGE SUM", sum(end - start for start, end in merged))
-    total_months = sum(end - start for start, end in merged)
-    total_years = total_months // 12
-    remaining_months = total_months % 12
+def mark_experience_relevance(
+    job_title: str, experience_periods: list[dict], relevance: dict | None = None
+):
+    """
+    The experience periods with a relevant flag for job_title, one cached
+    judgement per (job title, experience title) pair. With relevance (as
+    returned by judge_experience_relevance) no model is asked and titles
+    missing from it are not relevant.
+    """
+    if relevance is None:
+        relevance = judge_experience_relevance(job_title, experience_periods)
+    return [
+        {
+            **exp,
+            "relevant": relevance.get(normalize_key_part(exp.get("jobTitle")), False),
+        }
+        for exp in experience_periods
+    ]
 
-    total_years_with_months = total_years + (remaining_months / 12)
 
-    # Score calculation based on required years, if more than required, give bonus
-    if total_years_with_months >= job_relevant_experience_years:
-        bonus = (total_years_with_months - job_relevant_experience_years) * 10
-        score = 100 + bonus
-    else:
-        score = (total_years_with_months / job_relevant_experience_years) * 100
+def score_experience_years(
+    experience_periods: list[dict], job_relevant_experience_years: int, job_title: str
+):
+    # First get the relevant experience periods based on job title
+    relevant_experience = mark_experience_relevance(job_title, experience_periods)
 
-    return (relevant_experience, score, total_years_with_months)
+    # [{'id': 2, 'createdAt': '2025-10-10T13:44:04.582Z', 'updatedAt': '2025-10-10T13:47:20.892Z', 'jobTitle': 'Graphic Artist', 'startYear': '2011', 'endYear': 'Present', 'startMonth': 'April', 'endMonth': 'None', 'relevant': True, 'applicantId': 20}]
+    years, scores = score_experience(
+        [relevant_bounds(relevant_experience)], job_relevant_experience_years
+    )
+    return (relevant_experience, float(scores[0]), float(years[0]))
     #
 
 
@@ -351,3 +786,55 @@ def tz_score(a_hours: float, b_hours: float) -> float:
 
 
 # print(tz_score(-12, +14))
+
+
+def score_timezone_match(applicant_timezone: str, job_timezone: str) -> float:
+    """
+    Timezone score from "GMT+X" style strings, 0 when either side is unknown.
+    """
+    if applicant_timezone in (None, "Unknown") or job_timezone in (None, "Unknown"):
+        return 0.0
+
+    applicant_tz = float(applicant_timezone.split("GMT")[-1])
+    job_tz = float(job_timezone.split("GMT")[-1])
+
+    timezone_score, hour_gap = tz_score(applicant_tz, job_tz)
+    return timezone_score
+
+
+def compute_overall_score(
+    skills_score: float,
+    experience_score: float,
+    education_score: float,
+    timezone_score: float,
+    job_data: dict,
+) -> float:
+    overall = (
+        float(skills_score) * float(job_data.get("skillsWeight", 0))
+        + float(experience_score) * float(job_data.get("experienceWeight", 0))
+        + float(education_score) * float(job_data.get("educationWeight", 0))
+        + float(timezone_score) * float(job_data.get("timezoneWeight", 0))
+    )
+    return round(overall, 2)
+
+
+# Stored sub-score of an applicant and the job weight it is multiplied by
+SCORE_WEIGHTS = {
+    "skillsScoreAI": "skillsWeight",
+    "experienceScoreAI": "experienceWeight",
+    "educationScoreAI": "educationWeight",
+    "timezoneScoreAI": "timezoneWeight",
+}
+
+
+def compute_overall_scores(sub_scores: np.ndarray, job_data: dict) -> list[float]:
+    """
+    compute_overall_score for many applicants at once: one row of sub-scores
+    per applicant, in SCORE_WEIGHTS order.
+    """
+    overall = np.zeros(len(sub_scores))
+    # column by column in the same order as compute_overall_score, and
+    # round() rather than np.round, so both give exactly the same scores
+    for column, weight in enumerate(SCORE_WEIGHTS.values()):
+        overall += sub_scores[:, column] * float(job_data.get(weight, 0))
+    return [round(value, 2) for value in overall.tolist()]
@@ -0,0 +1,186 @@
+from contextlib import contextmanager
+from dotenv import load_dotenv
+import fcntl
+import json
+import os
+import re
+import threading
+import numpy as np
+import llm
+from cache import normalize_key_part
+
+load_dotenv()
+
+# Optional embedding tier of skills matching, between the local matcher and
+# skills_score
+SKILL_EMBEDDINGS = os.getenv("SKILL_EMBEDDINGS", "false").lower() == "true"
+SKILL_EMBEDDING_MODEL = os.getenv("SKILL_EMBEDDING_MODEL", "nomic-embed-text")
+# Cosine similarity of the closest CV skill from which a job skill counts as
+# an implied match, and below which it counts as missing. Depends on the
+# embedding model; the band in between is left to skills_score.
+SKILL_EMBEDDING_MATCH = float(os.getenv("SKILL_EMBEDDING_MATCH", "0.8"))
+SKILL_EMBEDDING_MISS = float(os.getenv("SKILL_EMBEDDING_MISS", "0.4"))
+SKILL_INDEX_DIR = os.getenv("SKILL_INDEX_DIR", ".cache/skill_index")
+# Rows the vector file grows by at least, so appends don't remap every time
+INDEX_GROWTH_ROWS = 1024
+
+
+class SkillIndex:
+    """
+    Persistent store of the embedding of every skill string seen, one
+    normalized float32 row per skill in a memory-mapped file, so rows are
+    paged in from disk on use instead of loaded at start.
+    Skills are keyed by normalize_key_part and embedded on first use, all
+    missing ones of a call in one request. Workers on the same host share the
+    directory: appends hold an exclusive lock on its lock file, and rows
+    other workers appended are picked up before a skill is embedded again.
+    """
+
+    def __init__(self, directory: str, model: str, host: str | None = None):
+        # vectors of different models don't compare, each gets its own store
+        self.directory = os.path.join(directory, re.sub(r"[^\w.-]+", "_", model))
+        self.model = model
+        self.host = host
+        self._lock = threading.Lock()
+        self._lock_path = os.path.join(self.directory, "lock")
+        self._meta_path = os.path.join(self.directory, "meta.json")
+        self._keys_path = os.path.join(self.directory, "skills.jsonl")
+        self._vectors_path = os.path.join(self.directory, "vectors.f32")
+        self._rows = {}
+        # lines of the keys file read so far and where they end
+        self._count = 0
+        self._keys_offset = 0
+        self._dim = None
+        self._vectors = None
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, self._file_lock(fcntl.LOCK_SH):
+            self._refresh()
+
+    @contextmanager
+    def _file_lock(self, operation: int):
+        with open(self._lock_path, "a") as f:
+            fcntl.flock(f, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """
+        Read the keys appended since the last call, by this or another
+        worker, and map the vector file at its current size.
+        """
+        if self._dim is None:
+            try:
+                with open(self._meta_path) as f:
+                    self._dim = json.load(f)["dim"]
+            except FileNotFoundError:
+                return
+        if os.path.getsize(self._keys_path) > self._keys_offset:
+            with open(self._keys_path, "rb") as f:
+                f.seek(self._keys_offset)
+                data = f.read()
+            # a key is appended after its row is written, so a worker killed
+            # mid-append at most leaves a partial last line, skipped here
+            complete = data[: data.rfind(b"\n") + 1]
+            for line in complete.decode("utf-8").splitlines():
+                self._rows.setdefault(json.loads(line), self._count)
+                self._count += 1
+            self._keys_offset += len(complete)
+        capacity = os.path.getsize(self._vectors_path) // (4 * self._dim)
+        if self._vectors is None or len(self._vectors) != capacity:
+            self._map(capacity)
+
+    def _map(self, capacity: int):
+        self._vectors = (
+            np.memmap(
+                self._vectors_path,
+                dtype=np.float32,
+                mode="r+",
+                shape=(capacity, self._dim),
+            )
+            if capacity
+            else None
+        )
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _append(self, keys: list[str], vectors: np.ndarray):
+        with self._file_lock(fcntl.LOCK_EX):
+            self._refresh()
+            # another worker may have stored some of them meanwhile
+            new = [index for index, key in enumerate(keys) if key not in self._rows]
+            if not new:
+                return
+            keys = [keys[index] for index in new]
+            vectors = vectors[new]
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                open(self._vectors_path, "wb").close()
+                open(self._keys_path, "wb").close()
+                with open(self._meta_path, "w") as f:
+                    json.dump({"model": self.model, "dim": self._dim}, f)
+            if os.path.getsize(self._keys_path) > self._keys_offset:
+                # partial line of a crashed writer
+                with open(self._keys_path, "r+b") as f:
+                    f.truncate(self._keys_offset)
+            start = self._count
+            capacity = len(self._vectors) if self._vectors is not None else 0
+            if start + len(keys) > capacity:
+                capacity = max(start + len(keys), capacity * 2, INDEX_GROWTH_ROWS)
+                if self._vectors is not None:
+                    self._vectors.flush()
+                    self._vectors = None
+                with open(self._vectors_path, "r+b") as f:
+                    f.truncate(capacity * self._dim * 4)
+                self._map(capacity)
+            self._vectors[start : start + len(keys)] = vectors
+            self._vectors.flush()
+            data = "".join(json.dumps(key) + "\n" for key in keys).encode("utf-8")
+            with open(self._keys_path, "ab") as f:
+                f.write(data)
+            self._keys_offset += len(data)
+            for key in keys:
+                self._rows[key] = self._count
+                self._count += 1
+
+    def vectors(self, skills: list[str]) -> np.ndarray:
+        """
+        Unit length embeddings of skills, one row each, embedding the ones not
+        stored yet.
+        """
+        keys = [normalize_key_part(skill) for skill in skills]
+        with self._lock:
+            missing = list(dict.fromkeys(key for key in keys if key not in self._rows))
+            if missing:
+                # other workers may have embedded them already
+                with self._file_lock(fcntl.LOCK_SH):
+                    self._refresh()
+                missing = [key for key in missing if key not in self._rows]
+        if missing:
+            # outside the lock, a slow embedding call shouldn't block lookups
+            vectors = np.asarray(
+                llm.embed(self.model, missing, self.host), dtype=np.float32
+            )
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms > 0, norms, 1)
+            with self._lock:
+                self._append(missing, vectors)
+        with self._lock:
+            if not keys:
+                return np.zeros((0, self._dim or 0), dtype=np.float32)
+            return self._vectors[[self._rows[key] for key in keys]]
+
+    def similarity(self, skills_a: list[str], skills_b: list[str]) -> np.ndarray:
+        """
+        Cosine similarity of every skill of skills_a (rows) to every skill of
+        skills_b (columns).
+        """
+        vectors = self.vectors(list(skills_a) + list(skills_b))
+        return vectors[: len(skills_a)] @ vectors[len(skills_a) :].T
+
+
+skill_index = (
+    SkillIndex(SKILL_INDEX_DIR, SKILL_EMBEDDING_MODEL) if SKILL_EMBEDDINGS else None
+)
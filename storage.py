@@ -0,0 +1,99 @@
+from minio import Minio
+from dotenv import load_dotenv
+import hashlib
+import os
+import tempfile
+
+load_dotenv()
+
+MINIO_BUCKET_NAME = os.getenv("MINIO_BUCKET_NAME")
+# Uploads bigger than this are rejected before they are downloaded
+MAX_RESUME_BYTES = int(os.getenv("MAX_RESUME_BYTES", str(20 * 1024**2)))
+# Resumes up to this size are kept in memory, bigger ones are streamed to disk
+RESUME_SPOOL_BYTES = int(os.getenv("RESUME_SPOOL_BYTES", str(2 * 1024**2)))
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+minio_client = Minio(
+    os.getenv("MINIO_ENDPOINT") + ":" + os.getenv("MINIO_PORT"),
+    access_key=os.getenv("MINIO_ACCESS_KEY"),
+    secret_key=os.getenv("MINIO_SECRET_KEY"),
+    secure=False,  # Use True for HTTPS, False for HTTP
+)
+
+
+class ResumeTooLarge(Exception):
+    pass
+
+
+class ResumeFile:
+    """
+    A downloaded resume. source is what the extractors take: the PDF bytes
+    for small files or the path of a temporary file for large ones.
+    sha256 is computed while downloading so the content is never hashed twice.
+    """
+
+    def __init__(self, source: bytes | str, size: int, sha256: str):
+        self.source = source
+        self.size = size
+        self.sha256 = sha256
+
+    def close(self):
+        if isinstance(self.source, str):
+            try:
+                os.remove(self.source)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def fetch_resume(resume_path: str) -> ResumeFile:
+    """
+    Stream a resume from MinIO without holding more than one copy of it in
+    memory, spooling large files to a temporary file on disk.
+    Raises ResumeTooLarge for files over MAX_RESUME_BYTES.
+    """
+    size = minio_client.stat_object(MINIO_BUCKET_NAME, resume_path).size
+    if size > MAX_RESUME_BYTES:
+        raise ResumeTooLarge(
+            f"{resume_path} is {size} bytes, the limit is {MAX_RESUME_BYTES}"
+        )
+
+    digest = hashlib.sha256()
+    received = 0
+    chunks = []
+    temp_file = None
+    response = minio_client.get_object(MINIO_BUCKET_NAME, resume_path)
+    try:
+        # only once the download started, so a failed request leaves no file
+        if size > RESUME_SPOOL_BYTES:
+            temp_file = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+        for chunk in response.stream(DOWNLOAD_CHUNK_BYTES):
+            received += len(chunk)
+            # the object can change between stat and download
+            if received > MAX_RESUME_BYTES:
+                raise ResumeTooLarge(
+                    f"{resume_path} is over the {MAX_RESUME_BYTES} byte limit"
+                )
+            digest.update(chunk)
+            if temp_file is not None:
+                temp_file.write(chunk)
+            else:
+                chunks.append(chunk)
+    except BaseException:
+        if temp_file is not None:
+            temp_file.close()
+            os.remove(temp_file.name)
+        raise
+    finally:
+        response.close()
+        response.release_conn()
+
+    if temp_file is not None:
+        temp_file.close()
+        return ResumeFile(temp_file.name, received, digest.hexdigest())
+    return ResumeFile(b"".join(chunks), received, digest.hexdigest())
@@ -1,4 +1,5 @@
 from pdfminer.high_level import extract_text
+import re
 
 
 def clean_response(response: str) -> str:
@@ -15,7 +16,81 @@ def clean_response(response: str) -> str:
     return response.strip()
 
 
-def extract_pdf_text(pdf_path: str) -> str:
-    text = extract_text(pdf_path)
+_PYTHON_LITERALS = {"None": "null", "True": "true", "False": "false"}
+
+
+def _strip_dangling(out: list[str]):
+    # drop a trailing comma (and the whitespace around it) before a closing bracket
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+    elif out and out[-1] == ":":
+        out.append("null")
+
+
+def repair_json(text: str) -> str:
+    """
+    Local fixes for the usual ways model output breaks JSON, tried before
+    asking a model again: text around the value, trailing commas, Python
+    literals, and strings / brackets left open when generation stopped.
+    """
+    text = clean_response(text)
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text
+    text = text[min(starts) :]
+
+    out = []
+    closers = []
+    in_string = False
+    escape = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            i += 1
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            _strip_dangling(out)
+            if closers:
+                out.append(closers.pop())
+            if not closers:
+                # anything after the top level value is commentary
+                break
+            i += 1
+            continue
+        else:
+            literal = re.match(r"None|True|False", text[i:])
+            if literal and not (out and (out[-1].isalnum() or out[-1] == "_")):
+                out.append(_PYTHON_LITERALS[literal.group()])
+                i += literal.end()
+                continue
+        out.append(ch)
+        i += 1
+
+    if in_string:
+        out.append('"')
+    while closers:
+        _strip_dangling(out)
+        out.append(closers.pop())
+    return "".join(out)
+
+
+def extract_pdf_text(pdf_path: str, max_pages: int = 0) -> str:
+    # max_pages 0 reads every page
+    text = extract_text(pdf_path, maxpages=max_pages)
     # clean up text a bit
     return text